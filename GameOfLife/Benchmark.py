@@ -0,0 +1,290 @@
+from .Engines import BitGrowthMedium, SparseGrowthMedium, StripedGrowthMedium, ParallelGrowthMedium
+from .HashLife import HashLifeGrowthMedium
+from .Models import GrowthMedium
+from .Tiles import TiledGrowthMedium
+from argparse import ArgumentParser
+from json import dump, load, loads
+from numpy.random import default_rng
+from os.path import abspath, dirname
+from platform import machine, python_version
+from subprocess import check_output
+from sys import executable, exit
+from time import perf_counter
+import tracemalloc
+
+
+class Benchmark:
+    """ Benchmark measures the throughput of the GrowthMedium engines, it does not need a display or Kivy.
+
+    Each engine evolves every stored GrowthMedium and random soups of several sizes and densities. A case is run twice:
+    once to time it and once under tracemalloc to measure the peak memory and the bytes allocated by each generation,
+    as the peak above the memory in use before it. Cells per second count the whole grid of bounded engines and the
+    rectangle with all the alive cells of unbounded ones.
+    The import of the modules used without a display is timed too, each in a new interpreter: it must stay within
+    import_budget seconds and must not load any of the heavy_modules.
+
+    """
+
+    engines = [GrowthMedium, BitGrowthMedium, SparseGrowthMedium, StripedGrowthMedium, ParallelGrowthMedium,
+               HashLifeGrowthMedium, TiledGrowthMedium]
+
+    soup_sizes = [(10, 16), (50, 80), (100, 160)]
+    soup_densities = [0.1, 0.3, 0.5]
+
+    # Modules imported without a display, the seconds each import may take and the modules they must not import
+    import_modules = ['GameOfLife', 'GameOfLife.Models', 'GameOfLife.Engines', 'GameOfLife.HashLife',
+                      'GameOfLife.Tiles', 'GameOfLife.Ensemble', 'GameOfLife.Census', 'GameOfLife.__main__']
+    import_budget = 0.5
+    import_repeat = 3
+    heavy_modules = ['kivy', 'scipy']
+
+    def __init__(self, engines: list = None, generations: int = 100, memory_generations: int = 20,
+                 patterns: bool = True, soups: bool = True, seed: int = 0, imports: bool = True):
+        self.engines = self.engines if engines is None else engines
+        self.generations = generations
+        self.memory_generations = memory_generations
+        self.patterns = patterns
+        self.soups = soups
+        self.seed = seed
+        self.imports = imports
+
+    #
+    #               Cases
+    #
+
+    def get_cases(self) -> list:
+        """ Return the list of pairs (name, build) of the cases, build gets an engine and returns its GrowthMedium. """
+        cases = []
+        if self.patterns:
+            for file in GrowthMedium.get_growth_medium_files():
+                cases.append((file, lambda engine, file=file: engine.load(file)))
+        if self.soups:
+            for rows, cols in self.soup_sizes:
+                for density in self.soup_densities:
+                    grid = (default_rng(self.seed).random((rows, cols)) < density) * 1
+                    cases.append(('soup {}x{} {}'.format(rows, cols, density),
+                                  lambda engine, grid=grid: engine.set(grid, 1)))
+        return cases
+
+    @staticmethod
+    def _get_cells(gm: GrowthMedium) -> int:
+        if gm._bounded:
+            return gm._min_rows * (gm._max_zoom + 1) * gm._min_cols * (gm._max_zoom + 1)
+        bounds = gm._get_bounds()
+        if bounds is None:
+            return 0
+        return (bounds[2] - bounds[0] + 1) * (bounds[3] - bounds[1] + 1)
+
+    @staticmethod
+    def _close(gm: GrowthMedium) -> None:
+        if hasattr(gm, 'close'):
+            gm.close()
+
+    #
+    #               Measures
+    #
+
+    def run_case(self, engine: type, build: object) -> dict:
+        """ Run a case with an engine.
+
+        :param engine: the GrowthMedium class to measure
+        :param build: the function which gets the engine and returns the GrowthMedium of the case
+        :return the measures: generations, seconds, gens_per_sec, cells_per_sec, peak_bytes and alloc_bytes_per_gen
+        :type engine: type
+        :type build: function
+        :rtype: dict
+
+        """
+        gm = build(engine)
+        gm.get_state_grid(0)
+        cells = self._get_cells(gm)
+        start = perf_counter()
+        for t in range(1, self.generations + 1):
+            gm.get_state_grid(t)
+        seconds = perf_counter() - start
+        cells = (cells + self._get_cells(gm)) / 2
+        self._close(gm)
+
+        tracemalloc.start()
+        try:
+            gm = build(engine)
+            gm.get_state_grid(0)
+            # the peak is reset for each generation, so the peak of the run is the highest of them
+            peak = tracemalloc.get_traced_memory()[1]
+            allocated = 0
+            for t in range(1, self.memory_generations + 1):
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                gm.get_state_grid(t)
+                generation_peak = tracemalloc.get_traced_memory()[1]
+                allocated += generation_peak - before
+                peak = max(peak, generation_peak)
+            self._close(gm)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+
+        return {'generations': self.generations,
+                'seconds': seconds,
+                'gens_per_sec': self.generations / seconds,
+                'cells_per_sec': self.generations * cells / seconds,
+                'peak_bytes': peak,
+                'alloc_bytes_per_gen': allocated / max(self.memory_generations, 1)}
+
+    def run_import(self, module: str) -> dict:
+        """ Import a module in a new interpreter, the best of import_repeat times.
+
+        :param module: the name of the module
+        :return the measures: module, seconds and heavy, the heavy_modules imported with it
+        :type module: str
+        :rtype: dict
+
+        """
+        code = ('from time import perf_counter\n'
+                'start = perf_counter()\n'
+                'import {}\n'
+                'seconds = perf_counter() - start\n'
+                'import json, sys\n'
+                'print(json.dumps({{"seconds": seconds, "modules": sorted({{m.split(".")[0] for m in sys.modules}})}}))')
+        seconds = None
+        heavy = []
+        for _ in range(self.import_repeat):
+            output = check_output([executable, '-c', code.format(module)], cwd=dirname(dirname(abspath(__file__))),
+                                  text=True)
+            measure = loads(output.splitlines()[-1])
+            seconds = measure['seconds'] if seconds is None else min(seconds, measure['seconds'])
+            heavy = sorted(set(heavy) | (set(measure['modules']) & set(self.heavy_modules)))
+        return {'module': module, 'seconds': seconds, 'heavy': heavy}
+
+    def run(self, verbose: bool = False) -> dict:
+        """ Run all the cases with all the engines.
+
+        :param verbose: print each result as soon as it is measured
+        :return the dict with the run settings, the list of results, one for each engine and case, and the list of
+                imports measured
+        :type verbose: bool
+        :rtype: dict
+
+        """
+        imports = []
+        if self.imports:
+            for module in self.import_modules:
+                measure = self.run_import(module)
+                imports.append(measure)
+                if verbose:
+                    print(self.format_import(measure))
+        results = []
+        for engine in self.engines:
+            for name, build in self.get_cases():
+                result = dict(engine=engine.__name__, case=name, **self.run_case(engine, build))
+                results.append(result)
+                if verbose:
+                    print(self.format_result(result))
+        return {'python': python_version(), 'machine': machine(), 'generations': self.generations,
+                'memory_generations': self.memory_generations, 'seed': self.seed, 'results': results,
+                'imports': imports}
+
+    @staticmethod
+    def format_result(result: dict) -> str:
+        return '{:<22} {:<22} {:>12.1f} gen/s {:>14.0f} cell/s {:>10.1f} KiB peak {:>10.1f} KiB/gen'.format(
+            result['engine'], result['case'], result['gens_per_sec'], result['cells_per_sec'],
+            result['peak_bytes'] / 1024, result['alloc_bytes_per_gen'] / 1024)
+
+    @staticmethod
+    def format_import(measure: dict) -> str:
+        return '{:<45} {:>12.1f} ms import {}'.format(
+            measure['module'], measure['seconds'] * 1000, ' '.join(measure['heavy']))
+
+    def check_imports(self, results: dict) -> list:
+        """ Return the imports of a run which exceed import_budget or load some of the heavy_modules. """
+        return [measure for measure in results.get('imports', [])
+                if measure['seconds'] > self.import_budget or measure['heavy']]
+
+    #
+    #               Files And Comparison
+    #
+
+    @staticmethod
+    def save(results: dict, file: str) -> None:
+        with open(file, 'w') as f:
+            dump(results, f, indent=2)
+
+    @staticmethod
+    def load(file: str) -> dict:
+        with open(file, 'r') as f:
+            return load(f)
+
+    @staticmethod
+    def compare(results: dict, baseline: dict, tolerance: float = 0.1) -> list:
+        """ Compare the results of a run with a baseline.
+
+        A case is a regression when its generations per second are lower, or its peak memory or allocated bytes per
+        generation are higher, than the baseline ones by more than tolerance. Cases missing in the baseline are ignored.
+
+        :param results: the results of a run
+        :param baseline: the results of the baseline run
+        :param tolerance: the relative change allowed
+        :return the list of regressions, dicts with engine, case, measure, baseline, value and change
+        :type results: dict
+        :type baseline: dict
+        :type tolerance: float
+        :rtype: list
+
+        """
+        old = {(r['engine'], r['case']): r for r in baseline['results']}
+        regressions = []
+        for r in results['results']:
+            b = old.get((r['engine'], r['case']))
+            if b is None:
+                continue
+            for measure, worse in (('gens_per_sec', -1), ('peak_bytes', 1), ('alloc_bytes_per_gen', 1)):
+                if b[measure] <= 0:
+                    continue
+                change = (r[measure] - b[measure]) / b[measure]
+                if change * worse > tolerance:
+                    regressions.append({'engine': r['engine'], 'case': r['case'], 'measure': measure,
+                                        'baseline': b[measure], 'value': r[measure], 'change': change})
+        return regressions
+
+
+def main(args: list = None) -> int:
+    """ Run the benchmark from the command line, returns 1 if a regression or an import over budget is found. """
+    engines = {engine.__name__: engine for engine in Benchmark.engines}
+    parser = ArgumentParser(prog='python -m GameOfLife.Benchmark', description='Measure the GrowthMedium engines.')
+    parser.add_argument('-e', '--engines', nargs='+', choices=sorted(engines), help='engines to measure (all)')
+    parser.add_argument('-g', '--generations', type=int, default=100, help='generations timed in each case')
+    parser.add_argument('-m', '--memory-generations', type=int, default=20, help='generations traced in each case')
+    parser.add_argument('--no-patterns', action='store_true', help='skip the stored growth mediums')
+    parser.add_argument('--no-soups', action='store_true', help='skip the random soups')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random soups')
+    parser.add_argument('-o', '--output', help='write the results in this JSON file')
+    parser.add_argument('-c', '--compare', help='compare the results with this JSON baseline')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.1, help='relative change allowed by --compare')
+    parser.add_argument('--no-imports', action='store_true', help='skip the import time budget')
+    parser.add_argument('--import-budget', type=float, default=Benchmark.import_budget,
+                        help='seconds allowed to each import')
+    args = parser.parse_args(args)
+
+    benchmark = Benchmark([engines[name] for name in args.engines] if args.engines else None, args.generations,
+                          args.memory_generations, not args.no_patterns, not args.no_soups, args.seed,
+                          not args.no_imports)
+    benchmark.import_budget = args.import_budget
+    results = benchmark.run(verbose=True)
+    if args.output:
+        Benchmark.save(results, args.output)
+    over = benchmark.check_imports(results)
+    for measure in over:
+        print('OVER BUDGET {}: {:.1f} ms import (budget {:.1f} ms){}'.format(
+            measure['module'], measure['seconds'] * 1000, benchmark.import_budget * 1000,
+            ', loads ' + ' '.join(measure['heavy']) if measure['heavy'] else ''))
+    if args.compare:
+        regressions = Benchmark.compare(results, Benchmark.load(args.compare), args.tolerance)
+        for r in regressions:
+            print('REGRESSION {engine} / {case}: {measure} {baseline:.6g} -> {value:.6g} ({change:+.1%})'.format(**r))
+        if regressions:
+            return 1
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,187 @@
+from .Formats import formats
+from hashlib import sha1
+from json import dump, load
+from numpy import array, count_nonzero, nonzero, packbits
+from os import replace, scandir, stat
+from os.path import abspath, dirname, join, splitext
+from threading import Lock
+
+
+class Catalog:
+    """ Catalog is a persistent index of the stored GrowthMedium files, it answers without loading the patterns.
+
+    For each file the index keeps its name, format, dimensions, population, bounding box of the alive cells and a hash of
+    its content, equal for the same pattern in any format. The index is saved as JSON in the store directory and each
+    entry is parsed again only when the modification time or the size of its file change.
+    The directory is listed again only when its own modification time changes, so repeated queries cost one stat for
+    the directory and one for each file.
+
+    """
+
+    _index_file = '.catalog.json'
+    _version = 1
+
+    def __init__(self, path: str = None):
+        self.path = join(dirname(abspath(__file__)), 'growth_mediums') if path is None else path
+        self._index_path = join(self.path, self._index_file)
+        self._lock = Lock()
+        self._entries = None
+        self._names = []
+        self._mtime = None
+
+    #
+    #               Index Maintenance
+    #
+
+    @staticmethod
+    def _describe(file: str) -> dict:
+        """ Parse a file and return its metadata, with the error instead if it can not be read. """
+        try:
+            with open(file, 'rb') as f:
+                grid = formats[splitext(file)[1]][0](f) > 0
+        except (OSError, SyntaxError, ValueError) as e:
+            return {'error': str(e)}
+        rows, cols = nonzero(grid.any(axis=1))[0], nonzero(grid.any(axis=0))[0]
+        if len(rows) == 0:
+            bbox, alive = None, grid[:0, :0]
+        else:
+            bbox = [int(rows[0]), int(cols[0]), int(rows[-1]), int(cols[-1])]
+            alive = grid[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+        content = sha1(array(alive.shape, dtype='<u4').tobytes() + packbits(alive).tobytes())
+        return {'rows': grid.shape[0], 'cols': grid.shape[1], 'population': int(count_nonzero(grid)), 'bbox': bbox,
+                'hash': content.hexdigest()}
+
+    def _read_index(self) -> dict:
+        try:
+            with open(self._index_path, 'r') as f:
+                index = load(f)
+        except (OSError, ValueError):
+            return {}
+        return index.get('entries', {}) if index.get('version') == self._version else {}
+
+    def _write_index(self) -> None:
+        try:
+            with open(self._index_path + '.tmp', 'w') as f:
+                dump({'version': self._version, 'entries': self._entries}, f)
+            replace(self._index_path + '.tmp', self._index_path)
+        except OSError:
+            pass
+
+    def _update_entry(self, entry: dict, file: str, path: str, info: object) -> dict:
+        """ Return entry, parsing the file again if it is None or its modification time or size changed. """
+        if entry is None or entry['mtime'] != info.st_mtime_ns or entry['size'] != info.st_size:
+            name, extension = splitext(file)
+            entry = dict(self._describe(path), name=name, format=extension[1:], mtime=info.st_mtime_ns,
+                         size=info.st_size)
+        return entry
+
+    def refresh(self) -> None:
+        """ Bring the index up to date with the store directory, parsing only new or modified files.
+
+        The indexed files are checked at each call, since a file rewritten in place does not change the modification
+        time of the directory; the directory is listed again, to find the files added or removed, only when its own
+        modification time changes.
+
+        """
+        with self._lock:
+            mtime = stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                old = self._entries
+                entries = {}
+                for file, entry in old.items():
+                    try:
+                        info = stat(join(self.path, file))
+                    except OSError:
+                        continue
+                    entries[file] = self._update_entry(entry, file, join(self.path, file), info)
+            else:
+                old = self._read_index() if self._entries is None else self._entries
+                entries = {}
+                for item in scandir(self.path):
+                    if splitext(item.name)[1] not in formats or not item.is_file():
+                        continue
+                    entries[item.name] = self._update_entry(old.get(item.name), item.name, item.path, item.stat())
+            changed = entries != old
+            self._entries = entries
+            self._names = sorted({entry['name'] for entry in entries.values()})
+            self._mtime = mtime
+            if changed:
+                # the index is written in the directory itself: if nothing else changed there, the new time of the
+                # directory is taken as known, so writing the index does not make the next call list it again
+                unchanged = stat(self.path).st_mtime_ns == mtime
+                self._write_index()
+                if unchanged:
+                    self._mtime = stat(self.path).st_mtime_ns
+
+    def invalidate(self) -> None:
+        """ Force the next query to list the store directory again, call it after writing a file in it. """
+        with self._lock:
+            self._mtime = None
+
+    #
+    #               Queries
+    #
+
+    def get_names(self) -> list:
+        """ Return the sorted names, without extension, of the stored files. """
+        self.refresh()
+        return list(self._names)
+
+    def exists(self, file: str) -> bool:
+        """ Return True if file, with or without a known extension, is stored. """
+        self.refresh()
+        if splitext(file)[1] in formats:
+            return file in self._entries
+        return file in self._names
+
+    def get(self, file: str) -> dict:
+        """ Return the entry of file, the first format found in formats order if it has not a known extension.
+
+        :param file: the name of the stored file
+        :return a dict with name, format, rows, cols, population, bbox (top, left, bottom, right or None if empty),
+                hash, mtime and size, with error instead of the metadata if the file can not be read; None if missing
+        :type file: str
+        :rtype: dict
+
+        """
+        self.refresh()
+        if splitext(file)[1] in formats:
+            return self._entries.get(file)
+        for extension in formats:
+            if file + extension in self._entries:
+                return self._entries[file + extension]
+        return None
+
+    def query(self, max_rows: int = None, max_cols: int = None, min_population: int = None,
+              max_population: int = None, format: str = None, content_hash: str = None) -> list:
+        """ Return the entries of the readable files matching all the given filters, sorted by name and format.
+
+        :param max_rows: the maximum number of rows
+        :param max_cols: the maximum number of columns
+        :param min_population: the minimum number of alive cells
+        :param max_population: the maximum number of alive cells
+        :param format: the extension, without dot, of the file
+        :param content_hash: the hash of the pattern, to find the copies of a pattern
+        :return the list of entries
+        :type max_rows: int
+        :type max_cols: int
+        :type min_population: int
+        :type max_population: int
+        :type format: str
+        :type content_hash: str
+        :rtype: list
+
+        """
+        self.refresh()
+        found = []
+        for entry in self._entries.values():
+            if 'error' in entry or \
+                    (max_rows is not None and entry['rows'] > max_rows) or \
+                    (max_cols is not None and entry['cols'] > max_cols) or \
+                    (min_population is not None and entry['population'] < min_population) or \
+                    (max_population is not None and entry['population'] > max_population) or \
+                    (format is not None and entry['format'] != format) or \
+                    (content_hash is not None and entry['hash'] != content_hash):
+                continue
+            found.append(entry)
+        return sorted(found, key=lambda entry: (entry['name'], entry['format']))
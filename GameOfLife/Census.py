@@ -0,0 +1,294 @@
+from .Engines import BitGrowthMedium, SparseGrowthMedium, StripedGrowthMedium
+from .Formats import write_rle
+from .Models import GrowthMedium
+from .Neighbors import convolve2d
+from .Rules import compile_rule, format_rule, parse_rule
+from argparse import ArgumentParser
+from hashlib import sha1
+from io import BytesIO
+from json import dump
+from multiprocessing import Pool, cpu_count
+from numpy import array, fliplr, nonzero, packbits, rot90, uint8, zeros
+from numpy.random import default_rng
+from os import replace
+from sys import exit
+from time import perf_counter
+
+
+#
+#               Objects Analysis
+#
+
+def _crop(cells: list) -> array([[]]):
+    """ Return the smallest boolean grid with the (row, col) cells alive. """
+    rows, cols = zip(*cells)
+    top, left = min(rows), min(cols)
+    grid = zeros((max(rows) - top + 1, max(cols) - left + 1), dtype=bool)
+    grid[array(rows) - top, array(cols) - left] = True
+    return grid
+
+
+def _cluster(cells: set, reach: int) -> list:
+    """ Split cells in the groups of cells connected through steps of at most reach rows and cols. """
+    cells = set(cells)
+    steps = [(dr, dc) for dr in range(-reach, reach + 1) for dc in range(-reach, reach + 1) if dr or dc]
+    groups = []
+    while cells:
+        stack = [cells.pop()]
+        group = []
+        while stack:
+            r, c = stack.pop()
+            group.append((r, c))
+            for dr, dc in steps:
+                if (r + dr, c + dc) in cells:
+                    cells.remove((r + dr, c + dc))
+                    stack.append((r + dr, c + dc))
+        groups.append(group)
+    return groups
+
+
+def _canonical(grid: array([[]])) -> tuple:
+    """ Return the pair (key, form) of a cropped grid, the same for all its rotations and reflections. """
+    forms = []
+    for k in range(4):
+        for form in (rot90(grid, k), fliplr(rot90(grid, k))):
+            forms.append((array(form.shape, dtype='<u2').tobytes() + packbits(form).tobytes(), form))
+    return min(forms, key=lambda pair: pair[0])
+
+
+def _to_rle(grid: array([[]])) -> str:
+    """ Return the RLE body, without header, of a grid. """
+    f = BytesIO()
+    write_rle(f, grid)
+    return ''.join(f.getvalue().decode().splitlines()[1:])
+
+
+def _analyse(grid: array([[]]), rule_table: array([]), max_period: int) -> tuple:
+    """ Evolve an object alone in an unbounded universe until it comes back to its first phase.
+
+    :param grid: the cropped object
+    :param rule_table: the lookup table of the rule, see Rules.compile_rule
+    :param max_period: the generations after which the object is not periodic
+    :return the pair (info, phases): info is None if the object dies or is not periodic, else a dict with kind ('still
+            life', 'oscillator' or 'spaceship'), period, displacement (the absolute rows and cols moved in a period,
+            greater first), population, rle and code of the object in its canonical phase; phases are the keys of the
+            phases met
+    :type grid: array([[]])
+    :type rule_table: array([])
+    :type max_period: int
+    :rtype: tuple
+
+    """
+    kernel = array([[1, 1, 1], [1, 9, 1], [1, 1, 1]], dtype=uint8)
+    first = grid
+    phases = [grid]
+    top = left = 0
+    for t in range(1, max_period + 1):
+        grid = rule_table[convolve2d(grid.view(uint8), kernel, mode='full')]
+        rows, cols = nonzero(grid.any(axis=1))[0], nonzero(grid.any(axis=0))[0]
+        if len(rows) == 0:
+            break
+        grid = grid[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1]
+        top, left = top - 1 + rows[0], left - 1 + cols[0]
+        if grid.shape == first.shape and (grid == first).all():
+            keys, forms = zip(*[_canonical(phase) for phase in phases])
+            canonical = min(keys)
+            phase = forms[keys.index(canonical)]
+            kind = 'spaceship' if top or left else 'still life' if t == 1 else 'oscillator'
+            return {'kind': kind, 'period': t, 'displacement': sorted((abs(int(top)), abs(int(left))), reverse=True),
+                    'population': int(phase.sum()), 'rle': _to_rle(phase),
+                    'code': sha1(canonical).hexdigest()[:16]}, keys
+        phases.append(grid)
+    return None, [_canonical(first)[0]]
+
+
+# Settings and objects already analysed, by key of their phase, of the worker process
+_settings = {}
+_objects = {}
+
+
+def _census_init(settings: dict) -> None:
+    _settings.clear()
+    _settings.update(settings, rule_table=compile_rule(settings['rule']))
+    _objects.clear()
+
+
+def _classify(grid: array([[]])) -> dict:
+    """ Return the info of an object, see _analyse, analysing it only if no phase of it was met before. """
+    key = _canonical(grid)[0]
+    if key not in _objects:
+        info, keys = _analyse(grid, _settings['rule_table'], _settings['max_period'])
+        for phase in keys:
+            _objects[phase] = info
+        _objects[key] = info
+    return _objects[key]
+
+
+def _census_soup(k: int) -> tuple:
+    """ Evolve the soup k until it is stable, returns the pair (generations, objects) with None objects if not. """
+    s = _settings
+    soup = default_rng([s['seed'], k]).random((s['soup_size'], s['soup_size'])) < s['density']
+    gm = s['engine'].set(soup * 1)
+    gm.set_rule(s['rule'])
+    for t in range(s['max_generations'] + 1):
+        _extinction, _steady_state, _ = gm.get_state_grid(t)
+        if _extinction or _steady_state or gm.get_cycle(t) is not None:
+            break
+    else:
+        return t, None
+
+    # objects are the 8-connected groups of cells, the groups not periodic alone are joined with the ones next to them
+    rows, cols = nonzero(gm._get_state()[0])
+    cells = list(zip(rows.tolist(), cols.tolist()))
+    objects = []
+    for cluster in _cluster(cells, 2):
+        parts = _cluster(cluster, 1)
+        infos = [_classify(_crop(part)) for part in parts]
+        if len(parts) > 1 and any(info is None for info in infos):
+            infos = [_classify(_crop(cluster))]
+        objects += infos
+    return t, objects
+
+
+def _census_batch(soups: range) -> dict:
+    """ Run the census of some soups, returns their counts and the info of each object found. """
+    result = {'soups': 0, 'unfinished': 0, 'generations': 0, 'counts': {}, 'objects': {}}
+    for k in soups:
+        generations, objects = _census_soup(k)
+        result['soups'] += 1
+        result['generations'] += generations
+        if objects is None:
+            result['unfinished'] += 1
+            continue
+        for info in objects:
+            code = 'unknown' if info is None else info['code']
+            result['counts'][code] = result['counts'].get(code, 0) + 1
+            if code not in result['objects']:
+                result['objects'][code] = info or {'kind': 'unknown'}
+    return result
+
+
+class Census:
+    """ Census counts the objects left by random soups, it does not need a display or Kivy.
+
+    Each soup is a square of random cells evolved by a GrowthMedium until extinction, steady state or a cycle, then its
+    ash is split in objects: the 8-connected groups of cells, joined with the groups next to them when they are not
+    periodic alone. Each object is evolved alone to classify it as still life, oscillator or spaceship and named by a
+    hash of its canonical form, the same for all its phases, rotations and reflections. The workers remember the objects
+    analysed, so an object already met is never analysed again.
+    Soups are run in batches by a pool of processes, the counts are merged as the batches end and the results file is
+    written again at most every flush_interval seconds.
+
+    """
+
+    engines = [GrowthMedium, BitGrowthMedium, SparseGrowthMedium, StripedGrowthMedium]
+
+    def __init__(self, soups: int = 1000, soup_size: int = 16, density: float = 0.5, rule: str = GrowthMedium.rule,
+                 engine: type = BitGrowthMedium, max_generations: int = 10000, max_period: int = 256,
+                 workers: int = None, batch: int = 20, seed: int = 0, flush_interval: float = 1.):
+        self.soups = soups
+        self.soup_size = soup_size
+        self.density = density
+        self.rule = format_rule(*parse_rule(rule))
+        self.engine = engine
+        self.max_generations = max_generations
+        self.max_period = max_period
+        self.workers = workers or cpu_count()
+        self.batch = max(int(batch), 1)
+        self.seed = seed
+        self.flush_interval = flush_interval
+
+    def _get_settings(self) -> dict:
+        return {'soup_size': self.soup_size, 'density': self.density, 'rule': self.rule, 'engine': self.engine,
+                'max_generations': self.max_generations, 'max_period': self.max_period, 'seed': self.seed}
+
+    @staticmethod
+    def _merge(results: dict, batch: dict) -> None:
+        for name in ('soups', 'unfinished', 'generations'):
+            results[name] += batch[name]
+        for code, count in batch['counts'].items():
+            if code not in results['objects']:
+                results['objects'][code] = dict(batch['objects'][code], count=0)
+            results['objects'][code]['count'] += count
+
+    @staticmethod
+    def save(results: dict, file: str) -> None:
+        """ Write the results in a JSON file, replacing it at once. """
+        results = dict(results, objects=dict(sorted(results['objects'].items(), key=lambda item: -item[1]['count'])))
+        with open(file + '.tmp', 'w') as f:
+            dump(results, f, indent=2)
+        replace(file + '.tmp', file)
+
+    def run(self, output: str = None, verbose: bool = False) -> dict:
+        """ Run the census of all the soups.
+
+        :param output: the JSON file of the results, written while the census goes on
+        :param verbose: print the progress after each batch
+        :return the dict with the census settings, the soups run, the soups not stable in max_generations, the
+                generations, the seconds, the soups per second and {code: info with count} of the objects found
+        :type output: str
+        :type verbose: bool
+        :rtype: dict
+
+        """
+        results = {'rule': self.rule, 'engine': self.engine.__name__, 'soup_size': self.soup_size,
+                   'density': self.density, 'seed': self.seed, 'soups': 0, 'unfinished': 0, 'generations': 0,
+                   'seconds': 0., 'soups_per_sec': 0., 'objects': {}}
+        batches = [range(k, min(k + self.batch, self.soups)) for k in range(0, self.soups, self.batch)]
+        start = flushed = perf_counter()
+        pool = None
+        try:
+            if self.workers > 1 and len(batches) > 1:
+                pool = Pool(min(self.workers, len(batches)), _census_init, (self._get_settings(),))
+                done = pool.imap_unordered(_census_batch, batches)
+            else:
+                _census_init(self._get_settings())
+                done = map(_census_batch, batches)
+            for batch in done:
+                self._merge(results, batch)
+                now = perf_counter()
+                results['seconds'] = now - start
+                results['soups_per_sec'] = results['soups'] / results['seconds']
+                if verbose:
+                    print('{soups:>8} soups {soups_per_sec:>8.1f} soups/s {:>6} objects'.format(
+                        len(results['objects']), **results))
+                if output is not None and now - flushed >= self.flush_interval:
+                    self.save(results, output)
+                    flushed = now
+        finally:
+            if pool is not None:
+                pool.terminate()
+        if output is not None:
+            self.save(results, output)
+        return results
+
+
+def main(args: list = None) -> int:
+    """ Run the census from the command line. """
+    engines = {engine.__name__: engine for engine in Census.engines}
+    parser = ArgumentParser(prog='python -m GameOfLife.Census', description='Count the objects left by random soups.')
+    parser.add_argument('-n', '--soups', type=int, default=1000, help='number of soups')
+    parser.add_argument('-s', '--size', type=int, default=16, help='side of the soups')
+    parser.add_argument('-d', '--density', type=float, default=0.5, help='density of alive cells in the soups')
+    parser.add_argument('-r', '--rule', default=GrowthMedium.rule, help='rule of the Game')
+    parser.add_argument('-e', '--engine', choices=sorted(engines), default=BitGrowthMedium.__name__,
+                        help='engine evolving the soups')
+    parser.add_argument('-g', '--max-generations', type=int, default=10000, help='generations to become stable')
+    parser.add_argument('-w', '--workers', type=int, help='worker processes (all the cpus)')
+    parser.add_argument('-b', '--batch', type=int, default=20, help='soups for each task of the workers')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the soups')
+    parser.add_argument('-o', '--output', help='write the results in this JSON file')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not print the progress')
+    args = parser.parse_args(args)
+
+    census = Census(args.soups, args.size, args.density, args.rule, engines[args.engine], args.max_generations,
+                    workers=args.workers, batch=args.batch, seed=args.seed)
+    results = census.run(args.output, verbose=not args.quiet)
+    for code, info in sorted(results['objects'].items(), key=lambda item: -item[1]['count'])[:20]:
+        print('{:>10} {:<16} {:<10} p{:<4} {}'.format(info['count'], code, info['kind'], info.get('period', '?'),
+                                                       info.get('rle', '')))
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -1,8 +1,17 @@
+from .Engines import SparseGrowthMedium
+from .History import History
 from .Models import GrowthMedium
+from .Profiler import Profiler
+from .Tiles import TiledGrowthMedium
+from collections import deque
+from contextlib import contextmanager
 from copy import copy
 from kivy.clock import Clock
 from kivy.event import EventDispatcher
-from kivy.properties import NumericProperty, ListProperty, BooleanProperty, StringProperty
+from kivy.properties import NumericProperty, ListProperty, BooleanProperty, StringProperty, ObjectProperty
+from numpy import array, flatnonzero
+from threading import Condition, Thread
+from time import perf_counter
 
 
 class GrowthMediumCTRL(EventDispatcher):
@@ -11,6 +20,8 @@ class GrowthMediumCTRL(EventDispatcher):
     This class contains methods and properties to manage current state and view.
     Menages evolution and current speed, asks to the GrowthMedium (model) for states updates and sets user custom modifies.
     Listens to views interaction and notifies current state updates by public Properties.
+    While the evolution runs the next generations are calculated by a background worker, which publishes them in a
+    bounded queue of frames consumed at the current speed; the worker is stopped whenever the model is touched.
 
     """
 
@@ -18,14 +29,23 @@ class GrowthMediumCTRL(EventDispatcher):
     round = NumericProperty()   # not shown
     fps = NumericProperty()
     zoom = NumericProperty()
+    turbo = BooleanProperty()
 
     # General system state variables
     can_run = BooleanProperty()
     is_running = BooleanProperty()
     custom_gm = BooleanProperty()
 
-    # Current cells' state
+    # Outer totalistic rule of the evolution, as canonical 'B/S' rulestring
+    rule = StringProperty(GrowthMedium.rule)
+
+    # Current cells' state and its changes from the previous one, (indices, states) or None when unknown
     gm_state_grid = ListProperty()
+    gm_state_delta = ObjectProperty(None, allownone=True)
+
+    # Cycle of the current evolution, period 0 until a cycle is detected
+    cycle_period = NumericProperty()
+    cycle_shift = ListProperty()
 
     # Grid dimension variables
     gm_min_cols = NumericProperty()
@@ -49,9 +69,45 @@ class GrowthMediumCTRL(EventDispatcher):
     # Read-Only model-dependent variables
     _min_zoom = _max_zoom = None
 
+    # Model used to build the GrowthMedium, any GrowthMedium subclass can be used
+    _engine = TiledGrowthMedium
+
+    # Model used when the density of alive cells is low (None to disable), with the densities to switch model
+    _sparse_engine = SparseGrowthMedium
+    _sparse_density = 0.01
+    _dense_density = 0.04
+
+    # Pause the evolution when a cycle is detected
+    _pause_on_cycle = True
+
+    # Generations calculated ahead of the shown one by the background worker
+    _frames_ahead = 2
+
+    # Generations calculated for each frame in turbo mode, 0 to fit them in a fraction _turbo_budget of the frame time,
+    # changed by set_turbo
+    _turbo_generations = 0
+    _turbo_budget = 0.8
+
+    # Profiler of the generations and of the frames shown, None to disable profiling
+    profiler = None
+
+    # Timeline of the evolution to seek any generation, None to disable it
+    history = None
+
+    # Checkpoint written in background every _checkpoint_interval generations while running, None to disable
+    _checkpoint_file = None
+    _checkpoint_interval = 1000
+    _checkpoint_round = 0
+
+    # Last visible grid published, with its position and dimension, to publish the next one as delta
+    _last_frame = None
+    _last_view = None
+
     # Others
     _gm = None
     _old_gm = None
+    _worker = None
+    _checkpoint_writer = None
 
     #
     #               Constructor
@@ -59,17 +115,23 @@ class GrowthMediumCTRL(EventDispatcher):
 
     def __init__(self):
         super(GrowthMediumCTRL, self).__init__()
+        self._frames = deque()
+        self._ready = Condition()
+        self._stopping = False
+        self.history = History()
         self.round = 0
         self.fps = 1
         self.gm_min_rows = self.gm_cur_rows = GrowthMedium._min_rows
         self.gm_min_cols = self.gm_cur_cols = GrowthMedium._min_cols
         self._min_zoom = self.zoom = GrowthMedium._min_zoom
         self._max_zoom = GrowthMedium._max_zoom
-        self.can_run = self.is_running = self.path_exists = self.custom_gm = False
+        self.can_run = self.is_running = self.path_exists = self.custom_gm = self.turbo = False
         self.path = ''
         self.pos_x = self.pos_y = 0.5
-        self._gm = GrowthMedium.set([[0] * self.gm_cur_cols] * self.gm_cur_rows)
-        _, _, self.gm_state_grid = self._gm.get_state_grid(0)
+        self._gm = self._engine.set([[0] * self.gm_cur_cols] * self.gm_cur_rows)
+        _, _, grid = self._gm.get_state_grid(0)
+        self._set_state_grid(grid)
+        self._clear_cycle()
 
     #
     #               Basic Evolution Controls
@@ -87,6 +149,7 @@ class GrowthMediumCTRL(EventDispatcher):
             self._set_custom_growth_medium()
         if self.can_run:
             self.is_running = True
+            self._start_worker()
             Clock.schedule_interval(self.update_state_grid, 1.0 / self.fps)
         else:
             raise SystemError('can not start')
@@ -94,13 +157,14 @@ class GrowthMediumCTRL(EventDispatcher):
     def pause_evolution(self) -> None:
         """ Stop the evolution.
 
-        This method stops the current evolution.
+        This method stops the current evolution, the generations already calculated by the background worker are shown.
 
         :rtype: None
 
         """
         self.is_running = False
         Clock.unschedule(self.update_state_grid)
+        self._stop_worker()
 
     def clear_evolution(self) -> None:
         """ Clear the evolution.
@@ -118,9 +182,13 @@ class GrowthMediumCTRL(EventDispatcher):
         self.can_run = False
         self._gm = None
         self.round = 0
-        self._gm = GrowthMedium.set([[0] * self.gm_cur_cols] * self.gm_cur_rows)
-        _, _, self.gm_state_grid = self._gm.get_state_grid(0)
-        if sum(self.gm_state_grid) == 0:
+        self._gm = self._engine.set([[0] * self.gm_cur_cols] * self.gm_cur_rows)
+        self._gm.set_rule(self.rule)
+        self._clear_history()
+        _, _, grid = self._gm.get_state_grid(0)
+        self._set_state_grid(grid)
+        self._clear_cycle()
+        if not any(self.gm_state_grid):
             self.can_run = False
 
     def reset_evolution(self) -> None:
@@ -141,12 +209,35 @@ class GrowthMediumCTRL(EventDispatcher):
                 self._old_gm = None
                 self.custom_gm = False
             self.round = 0
-            _, _, self.gm_state_grid = self._gm.get_state_grid(0)
-            if sum(self.gm_state_grid) == 0:
+            _, _, grid = self._gm.get_state_grid(0)
+            self._set_state_grid(grid)
+            self._clear_cycle()
+            if not any(self.gm_state_grid):
                 self.can_run = False
         else:
             raise SystemError('can not reset')
 
+    def set_rule(self, rule: str) -> None:
+        """ Change the rule of the Game.
+
+        This method makes the evolution go on from the current generation with another rule, as a 'B/S' rulestring or
+        by name (see Rules.rules). The history and the cycle found are forgotten, they belong to the old rule.
+
+        :param rule: the rule
+        :return None
+        :type rule: str
+        :rtype: None
+
+        """
+        with self._worker_stopped():
+            self._gm.set_rule(rule)
+            if self._old_gm is not None:
+                self._old_gm.set_rule(rule)
+            self.rule = self._gm.rule
+            self._clear_history()
+            self._clear_cycle()
+            self.can_run = self._gm.get_population() > 0
+
     #
     #               View Evolution Controls
     #
@@ -175,11 +266,55 @@ class GrowthMediumCTRL(EventDispatcher):
             self.fps -= 1
             self._update_speed_evolution()
 
+    def toggle_turbo(self) -> None:
+        """ Switch the turbo mode.
+
+        This method switches the turbo mode, in which many generations are calculated for each frame shown. Extinction
+        and steady state are still checked at each generation, so the evolution stops at the exact one.
+
+        :rtype: None
+
+        """
+        with self._worker_stopped():
+            self.turbo = not self.turbo
+
+    def set_turbo(self, generations: int = 0, budget: float = 0.8) -> None:
+        """ Set the generations calculated for each frame in turbo mode.
+
+        This method sets a fixed number of generations for each frame or, if generations is 0, the fraction of the
+        frame time in which as many generations as possible are calculated.
+
+        :param generations: the generations for each frame, 0 to fit them in the budget
+        :param budget: the fraction of the frame time, greater than 0 and at most 1
+        :return None
+        :type generations: int
+        :type budget: float
+        :rtype: None
+
+        """
+        if isinstance(generations, bool) or not isinstance(generations, int) or generations < 0:
+            raise ValueError('the generations must be an integer not less than 0')
+        if not 0 < budget <= 1:
+            raise ValueError('the budget must be greater than 0 and at most 1')
+        with self._worker_stopped():
+            self._turbo_generations = generations
+            self._turbo_budget = budget
+
     def _update_speed_evolution(self):
-        if self.is_running:
-            Clock.unschedule(self.update_state_grid)
-            self.update_state_grid()
-            Clock.schedule_interval(self.update_state_grid, 1.0 / self.fps)
+        with self._worker_stopped():
+            if self.is_running:
+                Clock.unschedule(self.update_state_grid)
+                self.update_state_grid()
+                if self.is_running:
+                    Clock.schedule_interval(self.update_state_grid, 1.0 / self.fps)
+
+    def _get_turbo(self) -> tuple:
+        """ Return the pair (generations, budget) for each frame: a fixed number of generations or a time budget. """
+        if not self.turbo:
+            return 1, None
+        if self._turbo_generations > 0:
+            return self._turbo_generations, None
+        return None, self._turbo_budget / self.fps
 
     def decrease_zoom(self):
         """ Increase the current grid dimension.
@@ -190,7 +325,8 @@ class GrowthMediumCTRL(EventDispatcher):
 
         """
         if self.zoom < self._max_zoom:
-            self._update_grid(self._gm.increase_state_grid_dimension())
+            with self._worker_stopped():
+                self._update_grid(self._gm.increase_state_grid_dimension())
 
     def increase_zoom(self) -> None:
         """ Decrease the current grid dimension.
@@ -201,7 +337,8 @@ class GrowthMediumCTRL(EventDispatcher):
 
         """
         if self.zoom > self._min_zoom:
-            self._update_grid(self._gm.decrease_state_grid_dimension())
+            with self._worker_stopped():
+                self._update_grid(self._gm.decrease_state_grid_dimension())
 
     def move_right(self) -> None:
         """ Move right.
@@ -211,7 +348,8 @@ class GrowthMediumCTRL(EventDispatcher):
         :rtype: None
 
         """
-        self._update_grid(self._gm.shift_grid_right())
+        with self._worker_stopped():
+            self._update_grid(self._gm.shift_grid_right())
 
     def move_left(self) -> None:
         """ Move Left.
@@ -221,7 +359,8 @@ class GrowthMediumCTRL(EventDispatcher):
         :rtype: None
 
         """
-        self._update_grid(self._gm.shift_grid_left())
+        with self._worker_stopped():
+            self._update_grid(self._gm.shift_grid_left())
 
     def move_up(self) -> None:
         """ Move up.
@@ -231,7 +370,8 @@ class GrowthMediumCTRL(EventDispatcher):
         :rtype: None
 
         """
-        self._update_grid(self._gm.shift_grid_up())
+        with self._worker_stopped():
+            self._update_grid(self._gm.shift_grid_up())
 
     def move_down(self) -> None:
         """ Move down.
@@ -241,7 +381,34 @@ class GrowthMediumCTRL(EventDispatcher):
         :rtype: None
 
         """
-        self._update_grid(self._gm.shift_grid_down())
+        with self._worker_stopped():
+            self._update_grid(self._gm.shift_grid_down())
+
+    def _set_state_grid(self, grid):
+        self.gm_state_delta = self._get_state_delta(grid)
+        self.gm_state_grid = grid
+
+    def _get_state_delta(self, grid) -> tuple:
+        """ Return the changes of the visible grid from the last one published, then remember it.
+
+        The last grid is kept by the controller and not by the model, so the delta is right also when the model is
+        replaced or edited: the cells are compared with what the view shows.
+
+        :param grid: the visible grid going to be published
+        :return the pair (indices, states) of the cells changed in the flat visible grid, None if there is not a previous
+                grid or the visible grid has been moved or resized
+        :rtype: tuple
+
+        """
+        frame = array(grid)
+        view = (self._gm.rows_shift, self._gm.cols_shift, self._gm.cur_rows, self._gm.cur_cols)
+        delta = None
+        if self._last_frame is not None and self._last_view == view and self._last_frame.shape == frame.shape:
+            indices = flatnonzero(frame != self._last_frame)
+            delta = indices.tolist(), frame[indices].tolist()
+        self._last_frame = frame
+        self._last_view = view
+        return delta
 
     def _update_grid(self, data):
         self.zoom = data['zoom']
@@ -249,7 +416,7 @@ class GrowthMediumCTRL(EventDispatcher):
         self.gm_cur_cols = data['cols']
         self.pos_x = data['hpos']
         self.pos_y = data['vpos']
-        self.gm_state_grid = data['grid']
+        self._set_state_grid(data['grid'])
 
     #
     #               Grid State Controls
@@ -258,7 +425,8 @@ class GrowthMediumCTRL(EventDispatcher):
     def update_state_grid(self, *args) -> None:
         """ Update the current state.
 
-        This method updates the current grid state on the next state.
+        This method updates the current grid state on the next state, the one published by the background worker when
+        the evolution runs, if it is ready.
 
         :param args: arguments about the moment when che update is request
         :return None
@@ -267,13 +435,160 @@ class GrowthMediumCTRL(EventDispatcher):
 
         """
         if self.can_run:
-            self.round += 1
-            _extinction, _steady_state, self.gm_state_grid = self._gm.get_state_grid(self.round)
+            if self._worker is not None:
+                with self._ready:
+                    frame = self._frames.popleft() if self._frames else None
+                    self._ready.notify()
+                if frame is not None:
+                    self._show_frame(frame)
+            else:
+                self._show_frame(self._next_frame(self.round + 1, self.cycle_period == 0, *self._get_turbo()))
+        else:
+            raise SystemError('can not run')
+
+    def _next_frame(self, t: int, find_cycle: bool, generations: int = 1, budget: float = None) -> tuple:
+        """ Calculate the frame of the generations from time t, as many as generations or as fit in budget seconds. """
+        deadline = perf_counter() + budget if budget is not None else None
+        cycle = None
+        n = 1
+        while True:
+            if self.profiler is not None:
+                _extinction, _steady_state, grid = self.profiler.profile(self._gm, t)
+            else:
+                _extinction, _steady_state, grid = self._gm.get_state_grid(t)
+            if self.history is not None:
+                self.history.record(self._gm, t)
+            if _extinction or _steady_state:
+                break
+            if find_cycle and cycle is None:
+                cycle = self._gm.get_cycle(t)
+                if cycle == (1, (0, 0)):
+                    cycle = None
+                elif cycle is not None and self._pause_on_cycle:
+                    break
+            if n == generations or self._stopping or (deadline is not None and perf_counter() >= deadline):
+                break
+            t += 1
+            n += 1
+        delta = self._get_state_delta(grid)
+        if self._checkpoint_file is not None and t - self._checkpoint_round >= self._checkpoint_interval:
+            self._write_checkpoint(self._checkpoint_file, self._gm.get_checkpoint(t))
+            self._checkpoint_round = t
+        if not (_extinction or _steady_state):
+            self._update_engine()
+        return t, _extinction, _steady_state, grid, delta, cycle, perf_counter()
+
+    def _show_frame(self, frame: tuple) -> None:
+        if isinstance(frame, Exception):
+            self.pause_evolution()
+            raise frame
+        self.round, _extinction, _steady_state, grid, self.gm_state_delta, cycle, created = frame
+        if self.profiler is not None:
+            _start = perf_counter()
+            self.profiler.record('frame_latency', _start - created)
+            self.gm_state_grid = grid
+            self.profiler.record('notification', perf_counter() - _start)
+        else:
+            self.gm_state_grid = grid
+        if _extinction or _steady_state:
+            self.pause_evolution()
+            self.can_run = False
+        elif cycle is not None:
+            self.cycle_period = cycle[0]
+            self.cycle_shift = list(cycle[1])
+            if self._pause_on_cycle:
+                self.pause_evolution()
+
+    def _clear_cycle(self):
+        self.cycle_period = 0
+        self.cycle_shift = [0, 0]
+        self._gm.get_cycle(self.round)
+
+    def fast_forward(self, generations: int) -> None:
+        """ Advance the evolution without calculating each generation.
+
+        This method uses the cycle detected in the current evolution to jump ahead by the given generations.
+
+        :param generations: the generations to advance
+        :return None
+        :type generations: int
+        :rtype: None
+
+        """
+        if self.can_run and self.cycle_period > 0:
+            with self._worker_stopped():
+                _extinction, _steady_state, grid = self._gm.fast_forward(self.round, generations)
+                self._set_state_grid(grid)
+                self.round += generations
             if _extinction or _steady_state:
                 self.pause_evolution()
                 self.can_run = False
         else:
-            raise SystemError('can not run')
+            raise SystemError('can not fast forward')
+
+    def seek(self, t: int) -> None:
+        """ Move the evolution to a generation.
+
+        This method pauses the evolution and rebuilds the generation t from the nearest generation recorded in the
+        history before it, the generations missing are calculated from there. The view does not move.
+
+        :param t: the generation to show
+        :return None
+        :type t: int
+        :rtype: None
+
+        """
+        if self.is_running:
+            self.pause_evolution()
+        if self.custom_gm:
+            raise SystemError('can not seek a custom growth medium')
+        t = max(int(t), 0)
+        checkpoint = self.history.get_checkpoint(t) if self.history is not None else None
+        if checkpoint is not None and (checkpoint['t'] > self.round or t < self.round):
+            viewport = (self._gm.cur_zoom, self._gm.cur_rows, self._gm.cur_cols, self._gm.rows_shift,
+                        self._gm.cols_shift)
+            self._gm = self._engine.from_checkpoint(dict(checkpoint, viewport=viewport))
+            self._gm.profiler = self.profiler
+            self._update_engine()
+            self.round = checkpoint['t']
+        elif t < self.round:
+            self._gm.get_state_grid(0)
+            self.round = 0
+        if self.history is not None:
+            self.history.record(self._gm, self.round)
+        _extinction = _steady_state = False
+        while self.round < t and not (_extinction or _steady_state):
+            _, _extinction, _steady_state = self._next_frame(self.round + 1, False)[:3]
+            self.round += 1
+        # the generations calculated are not shown, the view gets the whole grid
+        self._last_frame = None
+        self._set_state_grid(self._gm._get_visible_grid())
+        self._clear_cycle()
+        self.can_run = not (_extinction or _steady_state) and self._gm.get_population() > 0
+
+    def step_back(self, generations: int = 1) -> None:
+        """ Move the evolution back by some generations, see seek.
+
+        :param generations: the generations to go back
+        :return None
+        :type generations: int
+        :rtype: None
+
+        """
+        self.seek(self.round - generations)
+
+    def _clear_history(self):
+        if self.history is not None:
+            self.history.clear()
+
+    def _update_engine(self):
+        if self._sparse_engine is not None:
+            density = self._gm.get_density()
+            if isinstance(self._gm, self._sparse_engine):
+                if density > self._dense_density:
+                    self._gm = self._engine.convert(self._gm)
+            elif density < self._sparse_density:
+                self._gm = self._sparse_engine.convert(self._gm)
 
     def update_custom_growth_medium(self, i: int, j: int) -> None:
         """ Update the current grid.
@@ -290,19 +605,123 @@ class GrowthMediumCTRL(EventDispatcher):
         """
         if not self.custom_gm:
             self.custom_gm = True
+            self._clear_history()
             self._old_gm = self._gm
             self._gm = copy(self._old_gm)
             if not self.can_run:
                 self.can_run = True
-        self.gm_state_grid = self._gm.update_init_grid_cell(i, j)
-        if sum(self.gm_state_grid) == 0:
+        self._set_state_grid(self._gm.update_init_grid_cell(i, j))
+        if not any(self.gm_state_grid):
             self.can_run = False
 
     def _set_custom_growth_medium(self):
         self.custom_gm = False
         self._old_gm = None
         self.round = 0
-        _, _, self.gm_state_grid = self._gm.get_state_grid(0)
+        _, _, grid = self._gm.get_state_grid(0)
+        self._set_state_grid(grid)
+        self._clear_cycle()
+
+    #
+    #               Background Worker
+    #
+
+    def _start_worker(self):
+        if self._worker is None:
+            self._frames = deque()
+            self._stopping = False
+            self._worker = Thread(target=self._produce, args=(self.round, self.cycle_period == 0, *self._get_turbo()),
+                                  daemon=True)
+            self._worker.start()
+
+    def _stop_worker(self):
+        """ Stop the background worker and show the frames it has already published, so the model is at round. """
+        if self._worker is not None:
+            with self._ready:
+                self._stopping = True
+                self._ready.notify_all()
+            self._worker.join()
+            self._worker = None
+            frames, self._frames = self._frames, deque()
+            while frames:
+                self._show_frame(frames.popleft())
+
+    @contextmanager
+    def _worker_stopped(self):
+        running = self._worker is not None
+        self._stop_worker()
+        try:
+            yield
+        finally:
+            if running and self.is_running:
+                self._start_worker()
+
+    def _produce(self, t: int, find_cycle: bool, generations: int, budget: float) -> None:
+        _end = False
+        while not _end:
+            with self._ready:
+                while len(self._frames) >= self._frames_ahead and not self._stopping:
+                    self._ready.wait()
+                if self._stopping:
+                    return
+            try:
+                frame = self._next_frame(t + 1, find_cycle, generations, budget)
+            except Exception as e:
+                frame = e
+            with self._ready:
+                self._frames.append(frame)
+            if isinstance(frame, Exception):
+                return
+            t, _extinction, _steady_state, _, _, cycle, _ = frame
+            find_cycle = find_cycle and cycle is None
+            _end = _extinction or _steady_state or (cycle is not None and self._pause_on_cycle)
+
+    #
+    #               Profiling
+    #
+
+    def enable_profiling(self, trace_memory: bool = False) -> None:
+        """ Start profiling.
+
+        This method starts to record the time of each phase of the generations, the time spent between the calculation
+        of a frame and its notification and the time of the notification.
+
+        :param trace_memory: record also the bytes allocated by each generation, tracing the memory slows them down
+        :return None
+        :type trace_memory: bool
+        :rtype: None
+
+        """
+        with self._worker_stopped():
+            self.disable_profiling()
+            self.profiler = Profiler(trace_memory)
+
+    def disable_profiling(self) -> None:
+        """ Stop profiling.
+
+        This method stops the profiling, the measures are discarded.
+
+        :rtype: None
+
+        """
+        with self._worker_stopped():
+            if self.profiler is not None:
+                self.profiler.close()
+                self.profiler = None
+                self._gm.profiler = None
+
+    def dump_profile(self, file: str = None) -> str:
+        """ Dump the profiling measures.
+
+        :param file: the file where write the measures, if any
+        :return the measures as JSON
+        :type file: str
+        :rtype: str
+
+        """
+        if self.profiler is None:
+            raise SystemError('profiling is not enabled')
+        return self.profiler.dump(file)
 
     #
     #               Files I/O Controls
@@ -317,18 +736,103 @@ class GrowthMediumCTRL(EventDispatcher):
 
         """
         if self.path_exists:
-            self._gm = GrowthMedium.load(self.path, self.zoom)
-            self.gm_cur_rows = self._gm.cur_rows
-            self.gm_cur_cols = self._gm.cur_cols
-            self.zoom = self._gm.cur_zoom
-            self.pos_x = self.pos_y = 0.5
-            self.can_run = True
-            self.round = 0
-            _, _, self.gm_state_grid = self._gm.get_state_grid(0)
+            with self._worker_stopped():
+                self._gm = self._engine.load(self.path, self.zoom, rule=self.rule)
+                self.rule = self._gm.rule
+                self._clear_history()
+                self.gm_cur_rows = self._gm.cur_rows
+                self.gm_cur_cols = self._gm.cur_cols
+                self.zoom = self._gm.cur_zoom
+                self.pos_x = self.pos_y = 0.5
+                self.can_run = True
+                self.round = 0
+                _, _, grid = self._gm.get_state_grid(0)
+                self._set_state_grid(grid)
+                self._clear_cycle()
             self.clear_path()
         else:
             raise FileExistsError('\'{}._gm\' does not exists'.format(self.path))
 
+    def checkpoint_growth_medium(self, file: str, background: bool = True) -> None:
+        """ Save a checkpoint of the current evolution.
+
+        This method saves the whole current evolution (state, lifetimes, round, viewport and initial state) in a file,
+        the snapshot is taken at once and, if background, written by another thread.
+
+        :param file: the path of the checkpoint
+        :param background: write the file without waiting for it
+        :return None
+        :type file: str
+        :type background: bool
+        :rtype: None
+
+        """
+        with self._worker_stopped():
+            checkpoint = self._gm.get_checkpoint(self.round)
+        self._write_checkpoint(file, checkpoint, background)
+
+    def _write_checkpoint(self, file: str, checkpoint: dict, background: bool = True) -> None:
+        """ Write a checkpoint after the previous one, so two writes of the same file never overlap. """
+        if self._checkpoint_writer is not None:
+            self._checkpoint_writer.join()
+            self._checkpoint_writer = None
+        if background:
+            self._checkpoint_writer = Thread(target=GrowthMedium.write_checkpoint, args=(file, checkpoint), daemon=True)
+            self._checkpoint_writer.start()
+        else:
+            GrowthMedium.write_checkpoint(file, checkpoint)
+
+    def enable_checkpoints(self, file: str, interval: int = None) -> None:
+        """ Save checkpoints periodically.
+
+        This method makes the evolution save a checkpoint in file, in background, every interval generations.
+
+        :param file: the path of the checkpoints
+        :param interval: the generations between two checkpoints, _checkpoint_interval if None
+        :return None
+        :type file: str
+        :type interval: int
+        :rtype: None
+
+        """
+        with self._worker_stopped():
+            self._checkpoint_file = file
+            if interval is not None:
+                self._checkpoint_interval = max(int(interval), 1)
+            self._checkpoint_round = self.round
+
+    def disable_checkpoints(self) -> None:
+        """ Stop saving checkpoints periodically, waiting for the last one to be written. """
+        with self._worker_stopped():
+            self._checkpoint_file = None
+        if self._checkpoint_writer is not None:
+            self._checkpoint_writer.join()
+            self._checkpoint_writer = None
+
+    def resume_growth_medium(self, file: str) -> None:
+        """ Resume a checkpoint.
+
+        This method restores the evolution saved in a checkpoint, it goes on from the round where it was saved.
+
+        :param file: the path of the checkpoint
+        :return None
+        :type file: str
+        :rtype: None
+
+        """
+        if self.is_running:
+            self.pause_evolution()
+        self._gm, self.round = self._engine.resume(file)
+        self.rule = self._gm.rule
+        self._clear_history()
+        self._update_engine()
+        self.custom_gm = False
+        self._old_gm = None
+        self._checkpoint_round = self.round
+        self._update_grid(self._gm._get_grid_data())
+        self.can_run = self._gm.get_population() > 0
+        self._clear_cycle()
+
     def get_growth_medium_files(self) -> list:
         """ Get all saved initial states.
 
@@ -340,6 +844,19 @@ class GrowthMediumCTRL(EventDispatcher):
         """
         return GrowthMedium.get_growth_medium_files()
 
+    def get_growth_medium_info(self, name: str) -> dict:
+        """ Get the metadata of a saved initial state.
+
+        This method returns the catalog entry of a saved initial state, without loading it.
+
+        :param name: the file
+        :return: dict with name, format, rows, cols, population, bbox and hash, None if it does not exist
+        :type name: str
+        :rtype: dict
+
+        """
+        return GrowthMedium.catalog.get(name)
+
     def save_growth_medium(self) -> None:
         """ Save the current state.
 
@@ -0,0 +1,586 @@
+from .Models import GrowthMedium
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from multiprocessing import Pool, cpu_count
+from multiprocessing.shared_memory import SharedMemory
+from numpy import array, delete, dtype, insert, int64, ndarray, nonzero, ones, packbits, searchsorted, unique, unpackbits, \
+    uint8, uint64, where, zeros, zeros_like
+from time import perf_counter
+from weakref import finalize
+
+
+class BitGrowthMedium(GrowthMedium):
+    """ BitGrowthMedium represents a model of the Game Of Life with a bit-packed alive plane.
+
+    The alive cells are stored as rows of packed 64 bit words, one bit per cell, and the neighbors are counted with
+    bitwise full-adders over the shifted words. Any rule is applied as the union, over its counts, of the cells whose
+    square sum has the bits of the count. Lifetime, ancient cells and returned grid are the ones of GrowthMedium.
+
+    """
+
+    # Packed alive plane and packed masks of the hidden grid borders
+    _words = None
+    _sml_words = None
+    _big_words = None
+    _last_word = None
+
+    _one = uint64(1)
+    _top = uint64(63)
+
+    #
+    #               Packing Helpers
+    #
+
+    @staticmethod
+    def _pack(plane: array([[]])) -> array([[]]):
+        """ Pack a 2D alive plane.
+
+        This method packs every row of the plane in 64 bit words, the cell in column j is the bit j % 64 of the word
+        j // 64, unused bits of the last word are set to 0.
+
+        :param plane: the 2D array of the alive cells
+        :return the 2D array of packed words
+        :type plane: array([[]])
+        :rtype: array([[]])
+
+        """
+        rows, cols = plane.shape
+        padded = zeros((rows, -(-cols // 64) * 64), dtype=bool)
+        padded[:, :cols] = plane
+        return packbits(padded, axis=1, bitorder='little').view('<u8')
+
+    @staticmethod
+    def _unpack(words: array([[]]), cols: int) -> array([[]]):
+        """ Unpack a 2D array of packed words.
+
+        :param words: the 2D array of packed words
+        :param cols: the number of columns of the plane
+        :return the 2D boolean array of the alive cells
+        :type words: array([[]])
+        :type cols: int
+        :rtype: array([[]])
+
+        """
+        return unpackbits(words.view(uint8), axis=1, count=cols, bitorder='little').view(bool)
+
+    #
+    #               State Grid Getter
+    #
+
+    def _set_state(self, state_grid: array([[]]), lifetime: array([[]]), row: int, col: int) -> None:
+        super()._set_state(state_grid, lifetime, row, col)
+        self._words = None
+
+    def get_state_grid(self, t: int) -> array([[]]):
+        if t == 0:
+            self._words = None
+        return super().get_state_grid(t)
+
+    def _get_alive_map(self, t: int) -> array([[]]):
+        if self._words is None:
+            self._words = self._pack(self.cur_state_grid > 0)
+        if self._last_word is None:
+            self._sml_words = self._pack(self.sml_flat_earth_fallen)
+            self._big_words = self._pack(self.big_flat_earth_fallen)
+            self._last_word = self._pack(ones((1, self.init_grid.shape[1]), dtype=bool))[0, -1]
+
+        a = self._words
+
+        # horizontal neighbors, carrying the bits across adjacent words
+        west = a << self._one
+        west[:, 1:] |= a[:, :-1] >> self._top
+        east = a >> self._one
+        east[:, :-1] |= a[:, 1:] << self._top
+
+        # horizontal sum of the three cells of each row: h0 + 2 * h1
+        h0 = west ^ a ^ east
+        h1 = (west & a) | (east & (west ^ a))
+
+        u0, u1, d0, d1 = zeros_like(h0), zeros_like(h1), zeros_like(h0), zeros_like(h1)
+        u0[1:], u1[1:], d0[:-1], d1[:-1] = h0[:-1], h1[:-1], h0[1:], h1[1:]
+
+        # sum of the 3x3 square: s0 + 2 * (t0 + 2 * t1 + 4 * t2)
+        s0 = u0 ^ h0 ^ d0
+        c0 = (u0 & h0) | (d0 & (u0 ^ h0))
+        x1 = u1 ^ h1 ^ d1
+        y1 = (u1 & h1) | (d1 & (u1 ^ h1))
+        t0 = x1 ^ c0
+        t1 = y1 ^ (x1 & c0)
+        t2 = y1 & x1 & c0
+
+        if self._born == (3,) and self._survive == (2, 3):
+            # born with 3 cells in the square, survived with 4 cells in the square
+            a = (s0 & t0 & ~(t1 | t2)) | (a & ~s0 & ~t0 & t1)
+        else:
+            a = self._apply_rule(a, (s0, t0, t1, t2))
+        a[:, -1] &= self._last_word
+
+        if t % 10 == 0:
+            a &= self._big_words
+        elif t % 5 == 0:
+            a &= self._sml_words
+
+        self._words = a
+        return self._unpack(a, self.init_grid.shape[1])
+
+    def _apply_rule(self, a: array([[]]), bits: tuple) -> array([[]]):
+        """ Return the packed alive plane of the next generation under any rule.
+
+        :param a: the packed alive plane
+        :param bits: the packed bits (s0, t0, t1, t2) of the square sums s0 + 2 * (t0 + 2 * t1 + 4 * t2)
+        :return the packed alive plane of the next generation
+        :type a: array([[]])
+        :type bits: tuple
+        :rtype: array([[]])
+
+        """
+        result = zeros_like(a)
+        for total in range(10):
+            born = total in self._born
+            survive = total - 1 in self._survive
+            if not born and not survive:
+                continue
+            square = ~zeros_like(a)
+            for k, bit in enumerate(bits):
+                square &= bit if (total >> k) & 1 else ~bit
+            result |= square if born and survive else square & (~a if born else a)
+        return result
+
+
+class SparseGrowthMedium(GrowthMedium):
+    """ SparseGrowthMedium represents a model of the Game Of Life which stores only the alive cells.
+
+    The alive cells are kept as sorted keys of their coordinates with their lifetime and state, so the work of each
+    generation scales with the population instead of the grid area. The universe is bounded like the one of
+    GrowthMedium, or unbounded when converted from an unbounded model.
+
+    """
+
+    # Keys of the cells are (row + _key_offset) * _key_stride + (col + _key_offset)
+    _key_stride = 2 ** 32
+    _key_offset = 2 ** 30
+
+    # Sorted keys of the initial alive cells and of the alive cells, with their lifetime and state
+    _init_cells = array([], dtype=int64)
+
+    _cells = None
+    _ages = None
+    _states = None
+
+    @classmethod
+    def convert(cls, gm: GrowthMedium) -> object:
+        _gm = cls()
+        _gm._bounded = gm._bounded
+        return _gm._load_from(gm)
+
+    #
+    #               Keys Helpers
+    #
+
+    def _to_keys(self, rows: array([]), cols: array([])) -> array([]):
+        return (rows + self._key_offset) * self._key_stride + (cols + self._key_offset)
+
+    def _to_coords(self, keys: array([])) -> tuple:
+        rows, cols = divmod(keys, self._key_stride)
+        return rows - self._key_offset, cols - self._key_offset
+
+    def _inside(self, rows: array([]), cols: array([]), margin: int = 0) -> array([]):
+        _tot_rows = self._min_rows * (self._max_zoom + 1)
+        _tot_cols = self._min_cols * (self._max_zoom + 1)
+        return (rows >= margin) & (rows < _tot_rows - margin) & (cols >= margin) & (cols < _tot_cols - margin)
+
+    def _from_grid(self, grid: array([[]]), row: int, col: int) -> tuple:
+        rows, cols = nonzero(grid)
+        values = grid[rows, cols]
+        rows = rows + row
+        cols = cols + col
+        if self._bounded:
+            inside = self._inside(rows, cols)
+            rows, cols, values = rows[inside], cols[inside], values[inside]
+        return self._to_keys(rows.astype(int64), cols.astype(int64)), values
+
+    def _to_grid(self, keys: array([]), values: object, dtype: type = None) -> tuple:
+        dtype = self._state_dtype if dtype is None else dtype
+        if len(keys) == 0:
+            return zeros((1, 1), dtype=dtype), 0, 0
+        rows, cols = self._to_coords(keys)
+        row, col = rows.min(), cols.min()
+        grid = zeros((rows.max() - row + 1, cols.max() - col + 1), dtype=dtype)
+        grid[rows - row, cols - col] = values
+        return grid, int(row), int(col)
+
+    #
+    #               Grid Storage
+    #
+
+    def _set_init_grid(self, grid: array([[]]), row: int, col: int) -> None:
+        self._init_cells = self._from_grid(array(grid), row, col)[0]
+
+    def _get_init_grid(self) -> tuple:
+        return self._to_grid(self._init_cells, 1)
+
+    def _set_state(self, state_grid: array([[]]), lifetime: array([[]]), row: int, col: int) -> None:
+        self._cells, self._states = self._from_grid(array(state_grid).astype(self._state_dtype), row, col)
+        rows, cols = self._to_coords(self._cells)
+        self._ages = self._clip_lifetime(array(lifetime)[rows - row, cols - col])
+
+    def _get_state(self) -> tuple:
+        if not self.is_started():
+            grid, row, col = self._get_init_grid()
+            return grid, grid * 0, row, col
+        state_grid, row, col = self._to_grid(self._cells, self._states)
+        return state_grid, self._to_grid(self._cells, self._ages, self._lifetime_dtype)[0], row, col
+
+    def _toggle_init_cell(self, row: int, col: int) -> None:
+        key = self._to_keys(row, col)
+        pos = searchsorted(self._init_cells, key)
+        if pos < len(self._init_cells) and self._init_cells[pos] == key:
+            self._init_cells = delete(self._init_cells, pos)
+        else:
+            self._init_cells = insert(self._init_cells, pos, key)
+
+    def _get_visible_grid(self, init: bool = False) -> array([]):
+        if init or not self.is_started():
+            cells, states = self._init_cells, ones(len(self._init_cells), dtype=self._state_dtype)
+        else:
+            cells, states = self._cells, self._states
+        rows, cols = self._to_coords(cells)
+        rows = rows - self.rows_shift
+        cols = cols - self.cols_shift
+        visible = (rows >= 0) & (rows < self.cur_rows) & (cols >= 0) & (cols < self.cur_cols)
+        grid = zeros(self.cur_rows * self.cur_cols, dtype=self._state_dtype)
+        grid[rows[visible] * self.cur_cols + cols[visible]] = states[visible]
+        return grid
+
+    def _get_bounds(self) -> tuple:
+        cells = self._cells if self.is_started() else self._init_cells
+        if len(cells) == 0:
+            return None
+        rows, cols = self._to_coords(cells)
+        return rows.min(), cols.min(), rows.max(), cols.max()
+
+    def _get_alive_cells(self) -> tuple:
+        return self._to_coords(self._cells if self.is_started() else self._init_cells)
+
+    def is_started(self) -> bool:
+        return self._cells is not None
+
+    def get_population(self) -> int:
+        return len(self._cells if self.is_started() else self._init_cells)
+
+    #
+    #               State Grid Getter
+    #
+
+    def get_state_grid(self, t: int) -> array([[]]):
+        _profiler = self.profiler
+        if _profiler is not None:
+            _start = perf_counter()
+        if t == 0:
+            self._cells = self._init_cells.copy()
+            self._states = ones(len(self._cells), dtype=self._state_dtype)
+            self._ages = zeros(len(self._cells), dtype=self._lifetime_dtype)
+            grid = self._get_visible_grid()
+            if _profiler is not None:
+                _profiler.lap('viewport', _start)
+            return False, False, grid
+
+        dr, dc = nonzero(array(self._neighbors_filter))
+        offsets = (dr - 1) * self._key_stride + (dc - 1)
+        # the alive cells are candidates too, so they are found even without alive neighbors
+        candidates = (self._cells[None, :] + offsets[:, None]).ravel()
+        if self._bounded:
+            candidates = candidates[self._inside(*self._to_coords(candidates))]
+        candidates, counts = unique(insert(candidates, 0, self._cells), return_counts=True)
+
+        pos = searchsorted(self._cells, candidates).clip(0, max(len(self._cells) - 1, 0))
+        was_alive = self._cells[pos] == candidates
+        alive = self._rule_table[(counts - was_alive) + 9 * was_alive]
+        if _profiler is not None:
+            _start = _profiler.lap('neighbors', _start)
+
+        cells = candidates[alive]
+        ages = self._ages[pos[alive]]
+        ages = where(was_alive[alive], ages + (ages < self._max_lifetime), 1).astype(self._lifetime_dtype)
+        if self._bounded and t % 5 == 0:
+            keep = self._inside(*self._to_coords(cells), margin=3 if t % 10 == 0 else 1)
+            cells, ages = cells[keep], ages[keep]
+        if _profiler is not None:
+            _start = _profiler.lap('lifetime', _start)
+
+        prev_cells, prev_states = self._inner(self._cells, self._states)
+        self._cells = cells
+        self._ages = ages
+        self._states = self._get_state_map(self._ages)
+        if _profiler is not None:
+            _start = _profiler.lap('states', _start)
+
+        _steady_state = False
+        _extinction = False
+        cur_cells, cur_states = self._inner(self._cells, self._states)
+        if len(cur_cells) > 0:
+            if len(cur_cells) == len(prev_cells) and (cur_cells == prev_cells).all() \
+                    and (cur_states == prev_states).all():
+                _steady_state = True
+                self._states = self._states * 0 + self._state_dtype(2)
+        else:
+            _extinction = True
+        if _profiler is not None:
+            _start = _profiler.lap('check', _start)
+
+        grid = self._get_visible_grid()
+        if _profiler is not None:
+            _profiler.lap('viewport', _start)
+        return _extinction, _steady_state, grid
+
+    def _inner(self, cells: array([]), states: array([])) -> tuple:
+        if not self._bounded:
+            return cells, states
+        rows, cols = self._to_coords(cells)
+        hr = self._hidden_rows
+        hc = self._hidden_cols
+        _tot_rows = self._min_rows * (self._max_zoom + 1)
+        _tot_cols = self._min_cols * (self._max_zoom + 1)
+        inner = (rows >= hr) & (rows < _tot_rows - hr) & (cols >= hc) & (cols < _tot_cols - hc)
+        return cells[inner], states[inner]
+
+
+#
+#               Striped Evolution
+#
+
+
+def _step_band(buffers: dict, band: tuple) -> tuple:
+    """ Evolve the rows [r0, r1) of the grid at time t, reading the alive plane src, with the lookup table of the rule.
+
+    The rows next to the band (the halo) are read from the alive plane, the band is written in the other plane, in
+    lifetime and in state of buffers. Returns the pair (alive, changed) of the band rows in the not hidden part of the
+    grid. Only NumPy array operations are used, so bands can be evolved by concurrent threads.
+
+    """
+    r0, r1, t, src, rule_table = band
+    prev_alive = buffers['planes'][src]
+    rows, cols = prev_alive.shape
+    lo = max(r0 - 1, 0)
+    hi = min(r1 + 1, rows)
+
+    window = zeros((hi - lo + 2, cols + 2), dtype=uint8)
+    window[1:-1, 1:-1] = prev_alive[lo:hi]
+    cur_neighbors = prev_alive[r0:r1].view(uint8) * uint8(9)
+    for di, dj in zip(*nonzero(array(buffers['neighbors_filter']))):
+        cur_neighbors += window[r0 - lo + di:r1 - lo + di, dj:dj + cols]
+    cur_alive_map = rule_table[cur_neighbors]
+    lifetime = buffers['lifetime'][r0:r1]
+    lifetime = lifetime + (lifetime < buffers['max_lifetime'])
+    lifetime *= cur_alive_map
+    if t % 5 == 0:
+        margin = 3 if t % 10 == 0 else 1
+        lifetime[:max(margin - r0, 0)] = 0
+        lifetime[max(rows - margin - r0, 0):] = 0
+        lifetime[:, :margin] = 0
+        lifetime[:, cols - margin:] = 0
+    state = (lifetime > 0).view(uint8)
+    state += lifetime >= buffers['ancient_threshold']
+
+    hr = buffers['hidden_rows']
+    hc = buffers['hidden_cols']
+    i0 = min(max(hr - r0, 0), r1 - r0)
+    i1 = max(min(rows - hr - r0, r1 - r0), i0)
+    _alive = bool(state[i0:i1, hc:-hc].any())
+    _changed = not (state[i0:i1, hc:-hc] == buffers['state'][r0 + i0:r0 + i1, hc:-hc]).all()
+
+    buffers['lifetime'][r0:r1] = lifetime
+    buffers['state'][r0:r1] = state
+    buffers['planes'][1 - src][r0:r1] = lifetime > 0
+    return _alive, _changed
+
+
+class StripedGrowthMedium(GrowthMedium):
+    """ StripedGrowthMedium represents a model of the Game Of Life evolved by a pool of threads.
+
+    The grid is split in horizontal stripes, each generation the stripes are evolved concurrently, by NumPy operations
+    which release the GIL, and written in preallocated buffers. Each stripe has at least _min_stripe_cells cells, so a
+    grid smaller than two stripes is evolved in the calling thread. Results, lifetime included, are the ones of
+    GrowthMedium.
+
+    """
+
+    # Number of concurrent stripes, all the available cores if None
+    workers = None
+
+    # Cells of the smallest stripe worth a thread: a stripe costs about 8 ns a cell, handing it to a thread and
+    # waiting for it about 60 us, so with 8192 cells the grid of GrowthMedium (110 x 176) is split in 2 stripes
+    _min_stripe_cells = 2 ** 13
+
+    # Preallocated alive planes, lifetime and state with the model constants, and alive plane to read
+    _buffers = None
+    _src = 0
+
+    _executor = None
+    _finalizer = None
+
+    def _get_constants(self) -> dict:
+        return {'neighbors_filter': self._neighbors_filter, 'ancient_threshold': self._ancient_threshold,
+                'hidden_rows': self._hidden_rows, 'hidden_cols': self._hidden_cols,
+                'max_lifetime': self._max_lifetime, 'lifetime_dtype': self._lifetime_dtype,
+                'state_dtype': self._state_dtype}
+
+    def _get_stripes(self) -> int:
+        return max(min(self.workers or cpu_count(), self.init_grid.size // self._min_stripe_cells), 1)
+
+    def _allocate(self) -> None:
+        if self._buffers is not None:
+            return
+        shape = self.init_grid.shape
+        self._buffers = self._get_constants()
+        self._buffers['planes'] = [zeros(shape, dtype=bool), zeros(shape, dtype=bool)]
+        self.lifetime = self._buffers['lifetime'] = zeros(shape, dtype=self._lifetime_dtype)
+        self.cur_state_grid = self._buffers['state'] = zeros(shape, dtype=self._state_dtype)
+
+    def _map(self, bands: list) -> list:
+        if len(bands) == 1:
+            return [_step_band(self._buffers, bands[0])]
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(len(bands))
+            self._finalizer = finalize(self, self._executor.shutdown, False)
+        return list(self._executor.map(partial(_step_band, self._buffers), bands))
+
+    def close(self) -> None:
+        """ Stop the worker threads. """
+        if self._finalizer is not None:
+            self._finalizer()
+        self._executor = None
+        self._finalizer = None
+
+    def _set_state(self, state_grid: array([[]]), lifetime: array([[]]), row: int, col: int) -> None:
+        # the grids can be the buffers themselves, as returned by _get_state
+        state_grid, lifetime = array(state_grid), self._clip_lifetime(lifetime)
+        self._allocate()
+        self.cur_state_grid[:] = 0
+        self._paste(self.cur_state_grid, state_grid, row, col)
+        self.lifetime[:] = 0
+        self._paste(self.lifetime, lifetime, row, col)
+        self._src = 0
+        self._buffers['planes'][self._src][:] = self.cur_state_grid > 0
+
+    def _get_visible_grid(self, init: bool = False) -> array([]):
+        return array(super()._get_visible_grid(init))
+
+    def get_state_grid(self, t: int) -> array([[]]):
+        _profiler = self.profiler
+        if _profiler is not None:
+            _start = perf_counter()
+        if t == 0:
+            self._set_state(self.init_grid, zeros(self.init_grid.shape, dtype=self._lifetime_dtype), 0, 0)
+            grid = self._get_visible_grid()
+            if _profiler is not None:
+                _profiler.lap('viewport', _start)
+            return False, False, grid
+        self._allocate()
+
+        rows = self.init_grid.shape[0]
+        stripes = self._get_stripes()
+        bounds = [int(rows * k / stripes) for k in range(stripes + 1)]
+        results = self._map([(r0, r1, t, self._src, self._rule_table)
+                             for r0, r1 in zip(bounds[:-1], bounds[1:]) if r0 < r1])
+        self._src = 1 - self._src
+        # neighbors, lifetime and states are computed together by the step of each band
+        if _profiler is not None:
+            _start = _profiler.lap('bands', _start)
+
+        _steady_state = False
+        _extinction = False
+        if any(_alive for _alive, _ in results):
+            if not any(_changed for _, _changed in results):
+                _steady_state = True
+                self.cur_state_grid[:] = (self.cur_state_grid > 0) * 2
+        else:
+            _extinction = True
+        if _profiler is not None:
+            _start = _profiler.lap('check', _start)
+
+        grid = self._get_visible_grid()
+        if _profiler is not None:
+            _profiler.lap('viewport', _start)
+        return _extinction, _steady_state, grid
+
+
+#
+#               Parallel Workers
+#
+
+# Shared arrays of the worker process: two alive planes, lifetime and state, with the model constants
+_shared = {}
+
+
+def _parallel_init(names: tuple, shape: tuple, constants: dict) -> None:
+    """ Attach the worker process to the shared memory of a ParallelGrowthMedium. """
+    _shared['memory'] = [SharedMemory(name=name) for name in names]
+    _shared['planes'] = [ndarray(shape, dtype=bool, buffer=_shared['memory'][k].buf) for k in (0, 1)]
+    _shared['lifetime'] = ndarray(shape, dtype=constants['lifetime_dtype'], buffer=_shared['memory'][2].buf)
+    _shared['state'] = ndarray(shape, dtype=constants['state_dtype'], buffer=_shared['memory'][3].buf)
+    _shared.update(constants)
+
+
+def _parallel_step(band: tuple) -> tuple:
+    return _step_band(_shared, band)
+
+
+def _parallel_release(pool: object, memory: list) -> None:
+    if pool is not None:
+        pool.terminate()
+    for shm in memory:
+        shm.unlink()
+        try:
+            shm.close()
+        except BufferError:
+            # some arrays still use the buffer, it is released with them
+            pass
+
+
+class ParallelGrowthMedium(StripedGrowthMedium):
+    """ ParallelGrowthMedium represents a model of the Game Of Life evolved by a pool of processes.
+
+    The grid is split in bands of rows, each generation the bands are evolved by the worker processes over grids in
+    shared memory: the halo of each band is read directly from the shared alive plane, so the grid is never pickled.
+    Results, lifetime included, are the ones of GrowthMedium. Call close to release processes and shared memory.
+
+    """
+
+    # Number of worker processes, all the available cores if None
+    workers = None
+
+    _pool = None
+    _memory = ()
+
+    def _get_stripes(self) -> int:
+        return self.workers or cpu_count()
+
+    def _allocate(self) -> None:
+        if self._buffers is not None:
+            return
+        shape = self.init_grid.shape
+        size = shape[0] * shape[1]
+        self._memory = [SharedMemory(create=True, size=size), SharedMemory(create=True, size=size),
+                        SharedMemory(create=True, size=size * dtype(self._lifetime_dtype).itemsize),
+                        SharedMemory(create=True, size=size * dtype(self._state_dtype).itemsize)]
+        constants = self._get_constants()
+        self._buffers = dict(constants)
+        self._buffers['planes'] = [ndarray(shape, dtype=bool, buffer=self._memory[k].buf) for k in (0, 1)]
+        self.lifetime = self._buffers['lifetime'] = ndarray(shape, dtype=self._lifetime_dtype,
+                                                            buffer=self._memory[2].buf)
+        self.cur_state_grid = self._buffers['state'] = ndarray(shape, dtype=self._state_dtype,
+                                                               buffer=self._memory[3].buf)
+        self._pool = Pool(self._get_stripes(), _parallel_init, ([shm.name for shm in self._memory], shape, constants))
+        self._finalizer = finalize(self, _parallel_release, self._pool, self._memory)
+
+    def _map(self, bands: list) -> list:
+        return self._pool.map(_parallel_step, bands)
+
+    def close(self) -> None:
+        """ Stop the worker processes and release the shared memory. """
+        self.cur_state_grid = array(self.cur_state_grid)
+        self.lifetime = array(self.lifetime)
+        self._buffers = None
+        super().close()
+        self._pool = None
@@ -0,0 +1,156 @@
+from .Models import GrowthMedium
+from .Rules import compile_rule, format_rule, parse_rule
+from numpy import arange, array, count_nonzero, full, multiply, nonzero, uint8, zeros
+
+
+class Ensemble:
+    """ Ensemble evolves a batch of many independent universes of the same dimension at once.
+
+    The universes are the planes of 3D arrays (universe, row, col) and each generation advances all the active ones with
+    the same few array operations, so the Python overhead is paid once per generation and not once per universe.
+    The cells beyond the borders of a universe are dead. States, lifetimes and rule are the ones of GrowthMedium: a
+    universe is extinct when no cell is alive and in steady state when its states do not change in a generation, then
+    all its alive cells become ancient.
+    Extinct and steady universes drop out of the active batch, their last state and lifetime are kept.
+
+    """
+
+    _ancient_threshold = GrowthMedium._ancient_threshold
+
+    _neighbors_filter = GrowthMedium._neighbors_filter
+
+    _state_dtype = GrowthMedium._state_dtype
+    _lifetime_dtype = GrowthMedium._lifetime_dtype
+    _max_lifetime = GrowthMedium._max_lifetime
+
+    def __init__(self, grids: list, shape: tuple = None, rule: str = GrowthMedium.rule):
+        """ Build the batch at time 0.
+
+        :param grids: the initial grids, a 3D array or a list of 2D grids of any dimension
+        :param shape: the (rows, cols) of each universe, the grids are placed in its center; if None the largest grid
+        :param rule: the rule of all the universes, see Rules.parse_rule
+        :type grids: list
+        :type shape: tuple
+        :type rule: str
+
+        """
+        grids = [array(grid) > 0 for grid in grids]
+        if any(grid.ndim != 2 for grid in grids):
+            raise ValueError('the grids must be 2D')
+        if shape is None:
+            shape = (max((grid.shape[0] for grid in grids), default=1),
+                     max((grid.shape[1] for grid in grids), default=1))
+        rows, cols = shape
+        if any(grid.shape[0] > rows or grid.shape[1] > cols for grid in grids):
+            raise ValueError('the grids must fit in {}x{} universes'.format(rows, cols))
+
+        self.size = len(grids)
+        self.shape = (rows, cols)
+        self.set_rule(rule)
+        self.t = 0
+
+        self.state_grids = zeros((self.size, rows, cols), dtype=self._state_dtype)
+        for k, grid in enumerate(grids):
+            top = (rows - grid.shape[0]) // 2
+            left = (cols - grid.shape[1]) // 2
+            self.state_grids[k, top:top + grid.shape[0], left:left + grid.shape[1]] = grid
+        self.lifetime = zeros(self.state_grids.shape, dtype=self._lifetime_dtype)
+
+        # Results of each universe, finished_at is the generation in which it dropped out, -1 while active
+        self.population = count_nonzero(self.state_grids.reshape(self.size, -1), axis=1)
+        self.extinction = zeros(self.size, dtype=bool)
+        self.steady_state = zeros(self.size, dtype=bool)
+        self.finished_at = full(self.size, -1)
+
+        # Active batch: the indices of its universes, their states and lifetimes, and the zero-bordered alive planes
+        self.active = arange(self.size)
+        self._state = self.state_grids.copy()
+        self._lifetime = self.lifetime.copy()
+        self._window = zeros((self.size, rows + 2, cols + 2), dtype=uint8)
+        self._offsets = list(zip(*nonzero(array(self._neighbors_filter))))
+        empty = self.population == 0
+        self._drop(empty, empty, zeros(self.size, dtype=bool))
+
+    def set_rule(self, rule: str) -> None:
+        """ Change the rule of all the universes, see GrowthMedium.set_rule. """
+        self._born, self._survive = parse_rule(rule)
+        self.rule = format_rule(self._born, self._survive)
+        self._rule_table = compile_rule(rule)
+
+    #
+    #               Evolution
+    #
+
+    def _drop(self, done: array([]), extinction: array([]), steady_state: array([])) -> None:
+        """ Store the results of the active universes done and remove them from the active batch. """
+        if not done.any():
+            return
+        ids = self.active[done]
+        self.extinction[ids] = extinction[done]
+        self.steady_state[ids] = steady_state[done]
+        self.finished_at[ids] = self.t
+        self.state_grids[ids] = self._state[done]
+        self.lifetime[ids] = self._lifetime[done]
+        keep = ~done
+        self.active = self.active[keep]
+        self._state = self._state[keep]
+        self._lifetime = self._lifetime[keep]
+
+    def step(self, generations: int = 1) -> tuple:
+        """ Advance the active universes.
+
+        :param generations: the generations to advance, less if all the universes drop out before
+        :return the triple (extinction, steady_state, population) of vectors with an entry for each universe, the
+                population of a finished universe is the one of its last generation
+        :type generations: int
+        :rtype: tuple
+
+        """
+        rows, cols = self.shape
+        for _ in range(generations):
+            n = len(self.active)
+            if n == 0:
+                break
+            self.t += 1
+            window = self._window[:n]
+            alive = self._state > 0
+            window[:, 1:-1, 1:-1] = alive
+            counts = alive.view(uint8) * uint8(9)
+            for di, dj in self._offsets:
+                counts += window[:, di:di + rows, dj:dj + cols]
+            alive = self._rule_table[counts]
+
+            lifetime = self._lifetime + (self._lifetime < self._max_lifetime)
+            multiply(lifetime, alive, out=lifetime, casting='unsafe')
+            state = (lifetime > 0).view(uint8)
+            state += lifetime >= self._ancient_threshold
+
+            population = count_nonzero(alive.reshape(n, -1), axis=1)
+            extinction = population == 0
+            steady_state = ~extinction & (state == self._state).reshape(n, -1).all(axis=1)
+            state[steady_state] = (state[steady_state] > 0) * self._state_dtype(2)
+
+            self.population[self.active] = population
+            self._state = state
+            self._lifetime = lifetime
+            self._drop(extinction | steady_state, extinction, steady_state)
+        return self.extinction.copy(), self.steady_state.copy(), self.population.copy()
+
+    #
+    #               Getters
+    #
+
+    def is_done(self) -> bool:
+        """ Return True if all the universes dropped out of the active batch. """
+        return len(self.active) == 0
+
+    def get_state_grid(self, k: int) -> array([[]]):
+        """ Return the current states {0 -> dead, 1 -> alive, 2 -> ancient} of the universe k. """
+        i = nonzero(self.active == k)[0]
+        return self._state[i[0]].copy() if len(i) else self.state_grids[k].copy()
+
+    def get_state_grids(self) -> array([[[]]]):
+        """ Return the current states of all the universes, as a 3D array. """
+        grids = self.state_grids.copy()
+        grids[self.active] = self._state
+        return grids
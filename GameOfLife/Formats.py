@@ -0,0 +1,334 @@
+from numpy import array, bincount, concatenate, cumsum, diff, flatnonzero, frombuffer, fromstring, int8, int64, \
+    load, maximum, memmap, min_scalar_type, nonzero, packbits, savetxt, savez_compressed, stack, uint8, unpackbits, \
+    where, zeros
+from os import fstat
+from re import match
+from struct import Struct
+from zlib import compress, decompress
+
+# Bytes read at once by the streaming readers
+_chunk_size = 2 ** 20
+
+
+def _crop(grid: array([[]]), region: tuple) -> array([[]]):
+    """ Return the part of grid in region (top, left, rows, cols), the whole grid if region is None. """
+    if region is None:
+        return grid
+    top, left, rows, cols = region
+    return grid[top:top + rows, left:left + cols]
+
+
+#
+#               Plain Text (.gm)
+#
+
+
+def read_gm(f: object, region: tuple = None) -> array([[]]):
+    """ Read a grid of '0' and '1' rows from the binary file f, only its region if given. """
+    rows = f.read().split()
+    if not rows or len(set(map(len, rows))) > 1:
+        raise SyntaxError('Wrong file structure in {}'.format(f.name))
+    grid = frombuffer(b''.join(rows), dtype=uint8).reshape(len(rows), len(rows[0])) - ord('0')
+    if (grid > 1).any():
+        raise SyntaxError('Wrong file structure in {}'.format(f.name))
+    return _crop(grid, region)
+
+
+def write_gm(f: object, grid: array([[]])) -> None:
+    """ Write a grid as rows of '0' and '1' in the binary file f. """
+    lines = zeros((grid.shape[0], grid.shape[1] + 1), dtype=uint8)
+    lines[:, :-1] = (grid > 0) + ord('0')
+    lines[:, -1] = ord('\n')
+    f.write(lines.tobytes())
+
+
+#
+#               Run Length Encoded (.rle)
+#
+
+
+def _decode_runs(tokens: array([])) -> tuple:
+    """ Decode the bytes of RLE runs, ending with a tag, in the pair (counts, tags). """
+    is_tag = (tokens < ord('0')) | (tokens > ord('9'))
+    tags_pos = flatnonzero(is_tag)
+    digits_pos = flatnonzero(~is_tag)
+    run = cumsum(is_tag)[digits_pos]
+    exponent = tags_pos[run] - digits_pos - 1
+    values = (tokens[digits_pos] - ord('0')).astype(int64) * 10 ** exponent.astype(int64)
+    counts = bincount(run, weights=values, minlength=len(tags_pos)).astype(int64)
+    has_count = bincount(run, minlength=len(tags_pos)) > 0
+    return where(has_count, counts, 1), tokens[tags_pos]
+
+
+def _read_rle_header(f: object) -> bytes:
+    """ Return the header line of the binary RLE file f, after the comments. """
+    line = f.readline()
+    while line.startswith(b'#') or (line and not line.strip()):
+        line = f.readline()
+    return line
+
+
+def read_rle(f: object, region: tuple = None) -> array([[]]):
+    """ Read a grid from the binary RLE file f, only its region if given.
+
+    The runs are read in chunks of _chunk_size bytes and decoded with NumPy: each alive run marks its first and past
+    the last cell in a flat array, whose cumulated sum is the grid.
+
+    """
+    line = _read_rle_header(f)
+    header = match(rb'\s*x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)', line)
+    if header is None:
+        raise SyntaxError('Wrong RLE header in {}'.format(f.name))
+    cols, rows = int(header[1]), int(header[2])
+
+    starts = []
+    stops = []
+    row = col = 0
+    rest = array([], dtype=uint8)
+    ended = False
+    while not ended:
+        chunk = f.read(_chunk_size)
+        tokens = frombuffer(chunk, dtype=uint8)
+        tokens = concatenate((rest, tokens[tokens > ord(' ')]))
+        if chunk:
+            tags_pos = flatnonzero((tokens < ord('0')) | (tokens > ord('9')))
+            cut = tags_pos[-1] + 1 if len(tags_pos) > 0 else 0
+            tokens, rest = tokens[:cut], tokens[cut:]
+        else:
+            ended = True
+            if len(rest) > 0:
+                raise SyntaxError('Wrong RLE structure in {}'.format(f.name))
+        if len(tokens) == 0:
+            continue
+
+        counts, tags = _decode_runs(tokens)
+        end = flatnonzero(tags == ord('!'))
+        if len(end) > 0:
+            counts, tags = counts[:end[0]], tags[:end[0]]
+            ended = True
+
+        is_newline = tags == ord('$')
+        newlines = counts * is_newline
+        lengths = counts * ~is_newline
+        run_rows = row + cumsum(newlines) - newlines
+        ends = cumsum(lengths)
+        line_starts = maximum.accumulate(where(is_newline, ends, -col))
+        run_cols = ends - lengths - line_starts
+        alive = ~is_newline & (tags != ord('b'))
+        if len(tags) > 0:
+            row = int(run_rows[-1] + newlines[-1])
+            col = int(ends[-1] - line_starts[-1])
+
+        run_rows, run_cols, lengths = run_rows[alive], run_cols[alive], lengths[alive]
+        if ((run_rows >= rows) | (run_cols + lengths > cols)).any():
+            raise SyntaxError('Pattern larger than its header in {}'.format(f.name))
+        starts.append(run_rows * cols + run_cols)
+        stops.append(run_rows * cols + run_cols + lengths)
+
+    size = rows * cols + 1
+    starts = concatenate(starts) if starts else array([], dtype=int64)
+    stops = concatenate(stops) if stops else array([], dtype=int64)
+    borders = bincount(starts, minlength=size) - bincount(stops, minlength=size)
+    return _crop((cumsum(borders[:-1]) > 0).reshape(rows, cols).astype(uint8), region)
+
+
+def read_rle_rule(f: object) -> str:
+    """ Read the rule declared in the header of the binary RLE file f, None if the header has not one. """
+    line = _read_rle_header(f)
+    rule = match(rb'\s*x\s*=\s*\d+\s*,\s*y\s*=\s*\d+\s*,\s*rule\s*=\s*([^\s,]+)', line)
+    return rule[1].decode() if rule is not None else None
+
+
+def write_rle(f: object, grid: array([[]]), rule: str = 'B3/S23') -> None:
+    """ Write a grid in the binary RLE file f with the rule in the header, lines are at most 70 characters long. """
+    rows, cols = grid.shape
+    tokens = []
+    newlines = 0
+    for row in (grid > 0):
+        bounds = flatnonzero(diff(concatenate(([False], row, [False])).astype(int8)))
+        if len(bounds) == 0:
+            newlines += 1
+            continue
+        if tokens:
+            newlines += 1
+        if newlines:
+            tokens.append('{}$'.format(newlines) if newlines > 1 else '$')
+        newlines = 0
+        end = 0
+        for start, stop in zip(bounds[0::2], bounds[1::2]):
+            if start > end:
+                tokens.append('{}b'.format(start - end) if start - end > 1 else 'b')
+            tokens.append('{}o'.format(stop - start) if stop - start > 1 else 'o')
+            end = stop
+    tokens.append('!')
+
+    lines = ['x = {}, y = {}, rule = {}'.format(cols, rows, rule)]
+    line = ''
+    for token in tokens:
+        if len(line) + len(token) > 70:
+            lines.append(line)
+            line = ''
+        line += token
+    lines.append(line)
+    f.write(('\n'.join(lines) + '\n').encode())
+
+
+#
+#               Life 1.06 (.lif, .life)
+#
+
+
+def read_life106(f: object, region: tuple = None) -> array([[]]):
+    """ Read a grid from the binary Life 1.06 file f, only its region if given.
+
+    The coordinates are read in chunks of _chunk_size bytes, the top left alive cell is the origin of the grid.
+
+    """
+    if not f.readline().startswith(b'#Life 1.06'):
+        raise SyntaxError('Wrong Life 1.06 header in {}'.format(f.name))
+    coords = []
+    rest = b''
+    while True:
+        chunk = f.read(_chunk_size)
+        data = rest + chunk
+        if chunk:
+            cut = data.rfind(b'\n') + 1
+            data, rest = data[:cut], data[cut:]
+        if b'#' in data:
+            data = b'\n'.join(line for line in data.split(b'\n') if not line.startswith(b'#'))
+        values = fromstring(data.decode(), dtype=int64, sep=' ')
+        if len(values) % 2:
+            raise SyntaxError('Wrong Life 1.06 structure in {}'.format(f.name))
+        if len(values) > 0:
+            coords.append(values.reshape(-1, 2))
+        if not chunk:
+            break
+    if not coords:
+        return zeros((1, 1), dtype=uint8)
+    coords = concatenate(coords)
+    cols, rows = (coords - coords.min(axis=0)).T
+    grid = zeros((rows.max() + 1, cols.max() + 1), dtype=uint8)
+    grid[rows, cols] = 1
+    return _crop(grid, region)
+
+
+def write_life106(f: object, grid: array([[]])) -> None:
+    """ Write the alive cells of a grid in the binary Life 1.06 file f, as 'x y' lines. """
+    f.write(b'#Life 1.06\n')
+    rows, cols = nonzero(grid)
+    savetxt(f, stack((cols, rows), axis=1), fmt='%d')
+
+
+#
+#               Bit Packed Binary (.gmb, .gmbz)
+#
+
+# Header: magic, version, flags, reserved, rows, cols
+_gmb_header = Struct('<4sBBHII')
+_gmb_magic = b'\x89GMB'
+_gmb_version = 1
+_gmb_compressed = 1
+
+
+def read_gmb(f: object, region: tuple = None) -> array([[]]):
+    """ Read a grid from the binary file f, only its region if given.
+
+    The rows are bit packed, 8 cells for each byte with the first cell in the lowest bit. Uncompressed files are mapped
+    in memory, so only the bytes of the region are read.
+
+    """
+    header = f.read(_gmb_header.size)
+    if len(header) < _gmb_header.size:
+        raise SyntaxError('Wrong header in {}'.format(f.name))
+    magic, version, flags, _, rows, cols = _gmb_header.unpack(header)
+    if magic != _gmb_magic or version != _gmb_version:
+        raise SyntaxError('Wrong header in {}'.format(f.name))
+    row_bytes = (cols + 7) // 8
+    if rows * row_bytes == 0:
+        raise SyntaxError('Empty grid in {}'.format(f.name))
+    if flags & _gmb_compressed:
+        body = frombuffer(decompress(f.read()), dtype=uint8)
+    elif fstat(f.fileno()).st_size == _gmb_header.size + rows * row_bytes:
+        body = memmap(f, dtype=uint8, mode='r', offset=_gmb_header.size, shape=(rows * row_bytes,))
+    else:
+        body = None
+    if body is None or len(body) != rows * row_bytes:
+        raise SyntaxError('Wrong structure in {}'.format(f.name))
+    body = body.reshape(rows, row_bytes)
+
+    top, left, _rows, _cols = (0, 0, rows, cols) if region is None else region
+    top, left = max(top, 0), max(left, 0)
+    _rows, _cols = max(min(_rows, rows - top), 0), max(min(_cols, cols - left), 0)
+    first = left // 8
+    packed = array(body[top:top + _rows, first:(left + _cols + 7) // 8])
+    return unpackbits(packed, axis=1, bitorder='little')[:, left - first * 8:left - first * 8 + _cols]
+
+
+def write_gmb(f: object, grid: array([[]]), compressed: bool = False) -> None:
+    """ Write a grid with bit packed rows in the binary file f, compressed with zlib if compressed. """
+    rows, cols = grid.shape
+    body = packbits(grid > 0, axis=1, bitorder='little').tobytes()
+    f.write(_gmb_header.pack(_gmb_magic, _gmb_version, _gmb_compressed if compressed else 0, 0, rows, cols))
+    f.write(compress(body) if compressed else body)
+
+
+def write_gmbz(f: object, grid: array([[]])) -> None:
+    """ Write a grid with bit packed rows compressed with zlib in the binary file f. """
+    write_gmb(f, grid, compressed=True)
+
+
+# Readers and writers of each file extension, the first is the default one
+formats = {'.gm': (read_gm, write_gm),
+           '.rle': (read_rle, write_rle),
+           '.lif': (read_life106, write_life106),
+           '.life': (read_life106, write_life106),
+           '.gmb': (read_gmb, write_gmb),
+           '.gmbz': (read_gmb, write_gmbz)}
+
+# Formats which store the rule of the Game: reader of the rule, None if the file does not declare it, and writer of a
+# grid with its rule
+rule_formats = {'.rle': (read_rle_rule, write_rle)}
+
+
+#
+#               Checkpoints
+#
+
+_checkpoint_version = 1
+
+
+def write_checkpoint(f: object, checkpoint: dict) -> None:
+    """ Write a checkpoint returned by GrowthMedium.get_checkpoint in the binary file f, as a compressed NumPy archive.
+
+    States are stored as bytes and lifetimes with the smallest unsigned type holding their maximum.
+
+    """
+    init, init_row, init_col = checkpoint['init']
+    state, lifetime, row, col = checkpoint['state'] if checkpoint['state'] is not None else (init, init * 0, 0, 0)
+    meta = [_checkpoint_version, checkpoint['t'], *checkpoint['viewport'], init_row, init_col, row, col,
+            checkpoint['state'] is not None]
+    savez_compressed(f, meta=array(meta, dtype=int64), engine=array(checkpoint['engine']),
+                     rule=array(checkpoint.get('rule', 'B3/S23')),
+                     init=array(init, dtype=uint8), state=array(state, dtype=uint8),
+                     lifetime=array(lifetime).astype(min_scalar_type(max(int(array(lifetime).max(initial=0)), 0))))
+
+
+def read_checkpoint(f: object) -> dict:
+    """ Read a checkpoint from the binary file f, in the form returned by GrowthMedium.get_checkpoint. """
+    try:
+        with load(f, allow_pickle=False) as data:
+            meta = [int(x) for x in data['meta']]
+            checkpoint = {'engine': str(data['engine']),
+                          'rule': str(data['rule']) if 'rule' in data.files else 'B3/S23',
+                          'init': data['init'].astype(int64),
+                          'state': data['state'].astype(int64),
+                          'lifetime': data['lifetime'].astype(int64)}
+    except (OSError, KeyError, ValueError) as e:
+        raise SyntaxError('Wrong checkpoint in {}: {}'.format(f.name, e))
+    if meta[0] != _checkpoint_version or len(meta) != 12:
+        raise SyntaxError('Wrong checkpoint version in {}'.format(f.name))
+    _, t, zoom, rows, cols, rows_shift, cols_shift, init_row, init_col, row, col, started = meta
+    return {'engine': checkpoint['engine'], 'rule': checkpoint['rule'], 't': t,
+            'viewport': (zoom, rows, cols, rows_shift, cols_shift),
+            'init': (checkpoint['init'], init_row, init_col),
+            'state': (checkpoint['state'], checkpoint['lifetime'], row, col) if started else None}
@@ -0,0 +1,334 @@
+from .Models import GrowthMedium
+from .Rules import compile_rule
+from collections import OrderedDict
+from numpy import array, zeros
+from time import perf_counter
+from weakref import WeakValueDictionary
+
+
+class _Node:
+    """ _Node represents a square of 2^level x 2^level cells of the HashLife quadtree.
+
+    Nodes are canonical: two squares with the same content are the same object, so nodes are compared and hashed by
+    identity. Leaves have level 0 and represent a single dead or alive cell.
+
+    """
+    __slots__ = ('nw', 'ne', 'sw', 'se', 'level', 'population', '__weakref__')
+
+    def __init__(self, nw: object, ne: object, sw: object, se: object, level: int, population: int):
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+        self.level = level
+        self.population = population
+
+
+class HashLifeUniverse:
+    """ HashLifeUniverse represents an unbounded universe of the Game Of Life evolved with the HashLife algorithm.
+
+    The universe is a canonical quadtree whose root covers the square of 2^level side with the top left corner in
+    (row, col). Results of each node advanced by 2^j generations are memoized in a LRU table whose size is bounded by
+    cache_bytes, the nodes no more referenced by the tree or by the table are released.
+    The cells evolve with the lookup table rule_table of any rule (see Rules.compile_rule), Conway's one by default.
+
+    """
+
+    _dead = _Node(None, None, None, None, 0, 0)
+    _alive = _Node(None, None, None, None, 0, 1)
+
+    # Approximate memory used by a memoized result with its nodes
+    _entry_bytes = 400
+
+    def __init__(self, cache_bytes: int = 64 * 2 ** 20, rule_table: array([]) = None):
+        self._rule_table = tuple(bool(x) for x in (compile_rule('B3/S23') if rule_table is None else rule_table))
+        self._nodes = WeakValueDictionary()
+        self._memo = OrderedDict()
+        self._memo_limit = max(1, int(cache_bytes / self._entry_bytes))
+        self._empty = [self._dead]
+        self.root = self._dead
+        self.row = self.col = 0
+        self.generation = 0
+        self.hits = self.misses = self.evictions = 0
+
+    #
+    #               Nodes Factories
+    #
+
+    def _join(self, nw: _Node, ne: _Node, sw: _Node, se: _Node) -> _Node:
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            node = _Node(nw, ne, sw, se, nw.level + 1, nw.population + ne.population + sw.population + se.population)
+            self._nodes[key] = node
+        return node
+
+    def _empty_node(self, level: int) -> _Node:
+        while len(self._empty) <= level:
+            e = self._empty[-1]
+            self._empty.append(self._join(e, e, e, e))
+        return self._empty[level]
+
+    def _expand(self, node: _Node) -> _Node:
+        e = self._empty_node(node.level - 1)
+        return self._join(self._join(e, e, e, node.nw), self._join(e, e, node.ne, e),
+                          self._join(e, node.sw, e, e), self._join(node.se, e, e, e))
+
+    def _centre(self, node: _Node) -> _Node:
+        return self._join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def _build(self, grid: array([[]]), level: int) -> _Node:
+        if level == 0:
+            return self._alive if grid[0, 0] else self._dead
+        if not grid.any():
+            return self._empty_node(level)
+        h = 2 ** (level - 1)
+        return self._join(self._build(grid[:h, :h], level - 1), self._build(grid[:h, h:], level - 1),
+                          self._build(grid[h:, :h], level - 1), self._build(grid[h:, h:], level - 1))
+
+    #
+    #               Evolution
+    #
+
+    def _life_4x4(self, node: _Node) -> _Node:
+        cells = [[node.nw.nw, node.nw.ne, node.ne.nw, node.ne.ne],
+                 [node.nw.sw, node.nw.se, node.ne.sw, node.ne.se],
+                 [node.sw.nw, node.sw.ne, node.se.nw, node.se.ne],
+                 [node.sw.sw, node.sw.se, node.se.sw, node.se.se]]
+        _next = []
+        for i in (1, 2):
+            for j in (1, 2):
+                neighbors = sum(cells[i + di][j + dj].population
+                                for di in (-1, 0, 1) for dj in (-1, 0, 1) if di or dj)
+                alive = self._rule_table[neighbors + 9 * cells[i][j].population]
+                _next.append(self._alive if alive else self._dead)
+        return self._join(*_next)
+
+    def _step(self, node: _Node, j: int) -> _Node:
+        """ Advance the centre of a node.
+
+        :param node: a node of level k >= 2
+        :param j: the log2 of the generations to advance, at most k - 2
+        :return the node of level k - 1 in the centre of node advanced by 2^j generations
+        :type node: _Node
+        :type j: int
+        :rtype: _Node
+
+        """
+        if node.population == 0:
+            return node.nw
+        key = (node, j)
+        result = self._memo.get(key)
+        if result is not None:
+            self.hits += 1
+            self._memo.move_to_end(key)
+            return result
+        self.misses += 1
+
+        if node.level == 2:
+            result = self._life_4x4(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            n00, n02, n20, n22 = nw, ne, sw, se
+            n01 = self._join(nw.ne, ne.nw, nw.se, ne.sw)
+            n10 = self._join(nw.sw, nw.se, sw.nw, sw.ne)
+            n11 = self._join(nw.se, ne.sw, sw.ne, se.nw)
+            n12 = self._join(ne.sw, ne.se, se.nw, se.ne)
+            n21 = self._join(sw.ne, se.nw, sw.se, se.sw)
+            if j == node.level - 2:
+                half = j - 1
+                r = [self._step(n, half) for n in (n00, n01, n02, n10, n11, n12, n20, n21, n22)]
+            else:
+                half = j
+                r = [self._centre(n) for n in (n00, n01, n02, n10, n11, n12, n20, n21, n22)]
+            result = self._join(self._step(self._join(r[0], r[1], r[3], r[4]), half),
+                                self._step(self._join(r[1], r[2], r[4], r[5]), half),
+                                self._step(self._join(r[3], r[4], r[6], r[7]), half),
+                                self._step(self._join(r[4], r[5], r[7], r[8]), half))
+
+        self._memo[key] = result
+        if len(self._memo) > self._memo_limit:
+            self._memo.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def jump(self, k: int) -> int:
+        """ Advance the universe by 2^k generations in one step.
+
+        :param k: the log2 of the generations to advance
+        :return the current generation
+        :type k: int
+        :rtype: int
+
+        """
+        root = self.root
+        while root.level < max(k + 3, 3) or self._centre(self._centre(root)).population != root.population:
+            shift = 2 ** (root.level - 1)
+            root = self._expand(root)
+            self.row -= shift
+            self.col -= shift
+        root = self._expand(root)
+        shift = 2 ** (root.level - 2)
+        self.row -= shift
+        self.col -= shift
+
+        self.root = self._step(root, k)
+        shift = 2 ** (root.level - 2)
+        self.row += shift
+        self.col += shift
+        self.generation += 2 ** k
+        return self.generation
+
+    def advance(self, n: int) -> int:
+        """ Advance the universe by n generations, jumping by the powers of 2 which compose n.
+
+        :param n: the generations to advance
+        :return the current generation
+        :type n: int
+        :rtype: int
+
+        """
+        k = 0
+        while n > 0:
+            if n & 1:
+                self.jump(k)
+            n >>= 1
+            k += 1
+        return self.generation
+
+    #
+    #               Grid Getter And Setter
+    #
+
+    def set_grid(self, grid: array([[]]), row: int = 0, col: int = 0) -> None:
+        """ Replace the universe with a 2D grid of cells, the top left cell is placed in (row, col). """
+        grid = array(grid) > 0
+        level = 1
+        while 2 ** level < max(grid.shape):
+            level += 1
+        padded = zeros((2 ** level, 2 ** level), dtype=bool)
+        padded[:grid.shape[0], :grid.shape[1]] = grid
+        self.root = self._build(padded, level)
+        self.row = row
+        self.col = col
+        self.generation = 0
+
+    def get_grid(self, row: int, col: int, rows: int, cols: int) -> array([[]]):
+        """ Return the 2D boolean grid of the cells in the rectangle with the top left cell in (row, col). """
+        grid = zeros((rows, cols), dtype=bool)
+        self._paint(self.root, grid, self.row - row, self.col - col)
+        return grid
+
+    def _paint(self, node: _Node, grid: array([[]]), r: int, c: int) -> None:
+        size = 2 ** node.level
+        if node.population == 0 or r >= grid.shape[0] or c >= grid.shape[1] or r + size <= 0 or c + size <= 0:
+            return
+        if node.level == 0:
+            grid[r, c] = True
+        elif node.population == size * size:
+            grid[max(r, 0):r + size, max(c, 0):c + size] = True
+        else:
+            h = size // 2
+            self._paint(node.nw, grid, r, c)
+            self._paint(node.ne, grid, r, c + h)
+            self._paint(node.sw, grid, r + h, c)
+            self._paint(node.se, grid, r + h, c + h)
+
+    def cache_info(self) -> dict:
+        """ Return the statistics of the memo table. """
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(self._memo), 'limit': self._memo_limit, 'nodes': len(self._nodes)}
+
+
+class HashLifeGrowthMedium(GrowthMedium):
+    """ HashLifeGrowthMedium represents a model of the Game Of Life evolved with the HashLife algorithm.
+
+    The initial grid is placed in an unbounded HashLifeUniverse, any generation is reached jumping by powers of 2 from
+    the last one calculated, so the hidden grid is never erased. The visible grid and the state semantics are the ones
+    of GrowthMedium: after a jump only the last _ancient_threshold generations are calculated one by one to know the
+    ancient cells of the last two generations, so the lifetime saturates at _ancient_threshold + 1.
+
+    """
+
+    # Maximum memory of the memo table of the universe
+    cache_bytes = 64 * 2 ** 20
+
+    _universe = None
+    _generation = 0
+
+    # Extinction and steady state of the last generation calculated, returned again if it is asked again
+    _flags = (False, False)
+
+    def _set_state(self, state_grid: array([[]]), lifetime: array([[]]), row: int, col: int) -> None:
+        super()._set_state(state_grid, lifetime, row, col)
+        self._universe = None
+
+    def set_rule(self, rule: str) -> None:
+        super().set_rule(rule)
+        self._universe = None
+
+    def get_state_grid(self, t: int) -> array([[]]):
+        if self._universe is None and t > 0 and self.is_started():
+            self._universe = HashLifeUniverse(self.cache_bytes, self._rule_table)
+            self._universe.set_grid(self.cur_state_grid)
+            self._universe.generation = self._generation = t - 1
+        if t == 0 or self._universe is None or t < self._generation:
+            if self._universe is None:
+                self._universe = HashLifeUniverse(self.cache_bytes, self._rule_table)
+            self._universe.set_grid(self.init_grid)
+            self._generation = 0
+            _result = super().get_state_grid(0)
+            if t == 0:
+                return _result
+        elif t == self._generation:
+            return (*self._flags, self._get_visible_grid())
+        _profiler = self.profiler
+        if _profiler is not None:
+            _start = perf_counter()
+
+        prev_state_grid = self.cur_state_grid
+        if t - self._generation > self._ancient_threshold:
+            self._generation = self._universe.advance(t - self._generation - self._ancient_threshold)
+            self.lifetime = self._get_alive_map(self._generation).astype(self._lifetime_dtype)
+            if _profiler is not None:
+                _start = _profiler.lap('neighbors', _start)
+
+        # the phases are recorded for each generation advanced one at a time
+        while self._generation < t:
+            self._universe.advance(1)
+            self._generation += 1
+            prev_state_grid = self.cur_state_grid
+            cur_alive_map = self._get_alive_map(self._generation)
+            if _profiler is not None:
+                _start = _profiler.lap('neighbors', _start)
+            self.lifetime = self._grow_old(self.lifetime, cur_alive_map)
+            if _profiler is not None:
+                _start = _profiler.lap('lifetime', _start)
+            self.cur_state_grid = self._get_state_map(self.lifetime)
+            if _profiler is not None:
+                _start = _profiler.lap('states', _start)
+
+        _extinction, _steady_state = self._check_state_grid(prev_state_grid)
+        self._flags = (_extinction, _steady_state)
+        if _profiler is not None:
+            _start = _profiler.lap('check', _start)
+
+        grid = self.cur_state_grid[self.rows_shift:self.rows_shift+self.cur_rows,
+                                   self.cols_shift:self.cols_shift+self.cur_cols].ravel()
+        if _profiler is not None:
+            _profiler.lap('viewport', _start)
+        return _extinction, _steady_state, grid
+
+    def _get_alive_map(self, t: int) -> array([[]]):
+        return self._universe.get_grid(0, 0, *self.init_grid.shape)
+
+    def jump(self, k: int) -> tuple:
+        """ Advance the evolution by 2^k generations.
+
+        :param k: the log2 of the generations to advance
+        :return the same of get_state_grid at the reached generation
+        :type k: int
+        :rtype: tuple
+
+        """
+        return self.get_state_grid(self._generation + 2 ** k)
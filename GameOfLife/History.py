@@ -0,0 +1,143 @@
+from bisect import bisect_right
+from numpy import array, array_equal, int32, int64, minimum, nonzero, setxor1d, stack, zeros
+
+
+class History:
+    """ History records the timeline of an evolution, to rebuild any recorded generation without simulating it again.
+
+    Every interval generations, and whenever the recorded generations are not contiguous, a keyframe stores the whole
+    snapshot returned by GrowthMedium.get_checkpoint. Between keyframes each generation stores only the coordinates of
+    the cells which were born or died: the lifetime of the others follows from the previous generation.
+    When the recorded bytes exceed budget the oldest keyframe is dropped together with its deltas.
+
+    """
+
+    def __init__(self, interval: int = 64, budget: int = 64 * 2 ** 20):
+        self.interval = max(int(interval), 1)
+        self.budget = budget
+        self.clear()
+
+    def clear(self) -> None:
+        """ Forget all the recorded generations. """
+        self._times = []        # time of each keyframe
+        self._keyframes = []    # snapshot of each keyframe
+        self._deltas = []       # list of the (n, 2) born or dead cells of each generation after a keyframe
+        self._bytes = 0
+        self._last = None       # codes of the alive cells of the last recorded generation
+        self._cursor = None     # last generation recorded or calculated again
+        self._threshold = None  # lifetime of the ancient cells
+        self._max_lifetime = None
+
+    #
+    #               Recording
+    #
+
+    @staticmethod
+    def _get_alive(rows: array([]), cols: array([])) -> array([]):
+        """ Return the alive cells at (rows, cols) as sorted codes, (row << 32) + col + 2 ** 31. """
+        return (array(rows, dtype=int64) << 32) + (array(cols, dtype=int64) + 2 ** 31)
+
+    @staticmethod
+    def _get_changes(old: array([]), new: array([])) -> array([[]]):
+        """ Return the (n, 2) coordinates of the cells alive in only one of two generations, given by their codes. """
+        changes = setxor1d(old, new, assume_unique=True)
+        return stack((changes >> 32, (changes & 0xFFFFFFFF) - 2 ** 31), axis=1).astype(int32)
+
+    @staticmethod
+    def _get_size(keyframe: dict) -> int:
+        return sum(a.nbytes for a in keyframe['state'][:2]) + keyframe['init'][0].nbytes
+
+    def record(self, gm: object, t: int) -> None:
+        """ Record the generation t of a GrowthMedium, already calculated.
+
+        A generation already recorded, or before the first recorded one, is not stored again: the evolution is
+        deterministic. A generation which follows the last recorded one is stored as a delta, any other as a keyframe.
+
+        :param gm: the GrowthMedium, started
+        :param t: the time of its current state
+        :return None
+        :type gm: GrowthMedium
+        :type t: int
+        :rtype: None
+
+        """
+        last = self.get_last()
+        if last is not None and t <= last:
+            self._cursor = t
+            return
+        if last is not None and t == last + 1 == self._cursor + 1 and t - self._times[-1] < self.interval:
+            state = self._get_alive(*gm._get_alive_cells())
+            changes = self._get_changes(self._last, state)
+            self._deltas[-1].append(changes)
+            self._bytes += changes.nbytes
+        else:
+            keyframe = gm.get_checkpoint(t)
+            if self._keyframes and array_equal(self._keyframes[-1]['init'][0], keyframe['init'][0]) \
+                    and self._keyframes[-1]['init'][1:] == keyframe['init'][1:]:
+                keyframe['init'] = self._keyframes[-1]['init']
+            self._threshold = gm._ancient_threshold
+            self._max_lifetime = gm._max_lifetime
+            grid, _, row, col = keyframe['state']
+            rows, cols = nonzero(grid)
+            state = self._get_alive(rows + row, cols + col)
+            self._times.append(t)
+            self._keyframes.append(keyframe)
+            self._deltas.append([])
+            self._bytes += self._get_size(keyframe)
+        self._last = state
+        self._cursor = t
+        while self._bytes > self.budget and len(self._times) > 1:
+            self._bytes -= self._get_size(self._keyframes[0]) + sum(d.nbytes for d in self._deltas[0])
+            del self._times[0], self._keyframes[0], self._deltas[0]
+
+    #
+    #               Queries
+    #
+
+    def get_first(self) -> int:
+        """ Return the first recorded generation, None if empty. """
+        return self._times[0] if self._times else None
+
+    def get_last(self) -> int:
+        """ Return the last recorded generation, None if empty. """
+        return self._times[-1] + len(self._deltas[-1]) if self._times else None
+
+    def get_bytes(self) -> int:
+        """ Return the bytes used by the recorded generations. """
+        return self._bytes
+
+    def get_checkpoint(self, t: int) -> dict:
+        """ Rebuild the latest recorded generation not after t.
+
+        The keyframe before it is updated with its deltas: the changed cells are toggled and the lifetimes of the alive
+        cells increased, saturating, generation by generation.
+
+        :param t: the generation wanted
+        :return the snapshot, as returned by GrowthMedium.get_checkpoint, of the generation rebuilt, None if t is before
+                the first recorded generation
+        :type t: int
+        :rtype: dict
+
+        """
+        i = bisect_right(self._times, t) - 1
+        if i < 0:
+            return None
+        keyframe = self._keyframes[i]
+        deltas = self._deltas[i][:t - self._times[i]]
+        if not deltas:
+            return keyframe
+        states, lifetime, row, col = keyframe['state']
+        changes = [c for c in deltas if len(c)]
+        top = min([row] + [c[:, 0].min() for c in changes])
+        left = min([col] + [c[:, 1].min() for c in changes])
+        bottom = max([row + len(states)] + [c[:, 0].max() + 1 for c in changes])
+        right = max([col + states.shape[1]] + [c[:, 1].max() + 1 for c in changes])
+        alive = zeros((bottom - top, right - left), dtype=bool)
+        _lifetime = zeros(alive.shape, dtype=int)
+        alive[row - top:row - top + len(states), col - left:col - left + states.shape[1]] = states > 0
+        _lifetime[row - top:row - top + len(states), col - left:col - left + states.shape[1]] = lifetime
+        for c in deltas:
+            alive[c[:, 0] - top, c[:, 1] - left] ^= True
+            _lifetime = alive * minimum(_lifetime + 1, self._max_lifetime)
+        _states = ((_lifetime > 0) * (_lifetime < self._threshold) * 1) + ((_lifetime >= self._threshold) * 2)
+        return dict(keyframe, t=self._times[i] + len(deltas), state=(_states, _lifetime, top, left))
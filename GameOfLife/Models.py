@@ -1,9 +1,15 @@
 import GameOfLife
-from numpy import array
-from os import listdir
-from os.path import exists, dirname, abspath
-from re import match
-from scipy.signal import convolve2d
+from .Catalog import Catalog
+from .Formats import formats, read_checkpoint, rule_formats, write_checkpoint
+from .Neighbors import convolve2d
+from .Rules import compile_rule, format_rule, parse_rule
+from collections import deque
+from hashlib import sha256
+from numpy import array, count_nonzero, flatnonzero, iinfo, int64, minimum, multiply, nonzero, uint8, uint16, uint32, \
+    zeros
+from os import replace
+from os.path import exists, dirname, abspath, splitext
+from time import perf_counter
 
 
 class GrowthMedium:
@@ -24,6 +30,8 @@ class GrowthMedium:
     cols_shift = 0
 
     # Variables used to hide and manage errors caused by finite grid (should be infinite)
+    _bounded = True
+
     _hidden_rows = int(_min_rows / 2)
     _hidden_cols = int(_min_cols / 2)
 
@@ -41,12 +49,36 @@ class GrowthMedium:
 
     _neighbors_filter = [[1, 1, 1], [1, 0, 1], [1, 1, 1]]
 
+    # Outer totalistic rule of the Game with its neighbors counts of birth and survival and its lookup table
+    rule = 'B3/S23'
+    _born, _survive = parse_rule(rule)
+    _rule_table = compile_rule(rule)
+
+    # Types of the grids: states {0, 1, 2} in bytes and lifetimes saturating at the maximum of their type
+    _state_dtype = uint8
+    _lifetime_dtype = uint16
+    _max_lifetime = int(iinfo(_lifetime_dtype).max)
+
+    # Variables used to detect cycles: generations remembered, their signatures and the last cycle detected
+    _cycle_history = 256
+
+    _signatures = {}
+    _signatures_ring = None
+
+    _cycle = None
+
+    # Profiler recording the phases of each generation, None to disable profiling
+    profiler = None
+
+    # Index of the stored GrowthMedium files
+    catalog = Catalog()
+
     #
     #               Static Factories, Copy And Files Managers
     #
 
-    @staticmethod
-    def set(initial_state: array([[]]), zoom: int = 1) -> object:
+    @classmethod
+    def set(cls, initial_state: array([[]]), zoom: int = 1) -> object:
         """ Static Constructor, gets the initial grid and a minimum zoom required. Returns a GrowthMedium instance.
 
         The initial_state is a 2D numpy array in {0, 1}, who represent the initial state of each cell: dead or alive.
@@ -61,7 +93,7 @@ class GrowthMedium:
         :rtype: GrowthMedium
 
         """
-        gm = GrowthMedium()
+        gm = cls()
 
         rows = len(initial_state)
         cols = len(initial_state[0])
@@ -79,7 +111,9 @@ class GrowthMedium:
 
         gm.cur_zoom = int(max(r_zoom, c_zoom, _zoom))
         if gm.cur_zoom > GrowthMedium._max_zoom:
-            raise ImportError('Growth Medium is too large')
+            if gm._bounded:
+                raise ImportError('Growth Medium is too large')
+            gm.cur_zoom = GrowthMedium._max_zoom
 
         gm.cur_rows = gm._min_rows * gm.cur_zoom
         gm.cur_cols = gm._min_cols * gm.cur_zoom
@@ -90,77 +124,116 @@ class GrowthMedium:
         load_rows_shift = gm.rows_shift + int(((gm.cur_rows - rows) / 2))
         load_cols_shift = gm.cols_shift + int(((gm.cur_cols - cols) / 2))
 
-        _tot_cols = gm._min_cols * (gm._max_zoom + 1)
-        _tot_rows = gm._min_rows * (gm._max_zoom + 1)
-
-        gm.init_grid = array([[0] * _tot_cols] * _tot_rows)
-
-        gm.init_grid[load_rows_shift:rows + load_rows_shift,
-                     load_cols_shift:cols + load_cols_shift] = array(initial_state)
-
-        gm.sml_flat_earth_fallen = array([[False] * _tot_cols] * _tot_rows)
-        gm.sml_flat_earth_fallen[1:-1, 1:-1] = array([[True] * (_tot_cols - 2)] * (_tot_rows - 2))
-
-        gm.big_flat_earth_fallen = array([[False] * _tot_cols] * _tot_rows)
-        gm.big_flat_earth_fallen[3:-3, 3:-3] = array([[True] * (_tot_cols - 6)] * (_tot_rows - 6))
+        gm._set_init_grid(array(initial_state).astype(gm._state_dtype), load_rows_shift, load_cols_shift)
 
         return gm
 
-    @staticmethod
-    def load(file: str, zoom: int=1) -> object:
+    @classmethod
+    def load(cls, file: str, zoom: int=1, region: tuple = None, rule: str = None) -> object:
         """ Static Constructor, gets a file name and a minimum zoom required. Returns a GrowthMedium instance.
 
-        GrowthMedium files (.gm) are loaded from a directory in the GameOfLife package.
+        GrowthMedium files are loaded from a directory in the GameOfLife package, in any of the formats: plain text
+        (.gm), RLE (.rle), Life 1.06 (.lif, .life) and bit packed binary (.gmb, .gmbz compressed). Without extension the
+        first format found is loaded.
         Zoom defines the minimum zoom required by the GrowthMediumCtrl, if it is not enough to include all the
         initial cell the grid will be expanded as required at most _max_zoom.
+        Region limits the initial state to a rectangle of the saved one, uncompressed binary files read only its bytes.
+        The GrowthMedium has the rule declared by the file (RLE only), or rule if the file does not declare one.
 
         :param file: the name of the saved initial state
         :param zoom: the minimum zoom required by the controller
+        :param region: the rectangle (top, left, rows, cols) to load, None for all the saved initial state
+        :param rule: the rule if the file does not declare one, the one of the class if None
         :return the associated GrowthMedium instance
         :type file: str
         :type zoom: int
+        :type region: tuple
+        :type rule: str
         :rtype: GrowthMedium
 
         """
-        path = '{}/growth_mediums/{}.gm'.format(dirname(abspath(GameOfLife.__file__)), file)
+        path = GrowthMedium._get_growth_medium_path(file)
         if exists(path):
-            grid = []
-            with open(path, 'r') as f:
-                for line in f:
-                    row = match('[01]*', line)[0]
-                    if len(row) > 0:
-                        grid.append(list(row))
-            num_cols = max([len(row) for row in grid])
-            if [True for row in grid if num_cols != len(row)]:
-                raise SyntaxError('Wrong file structure in {}.gm'.format(file))
-            return GrowthMedium.set(grid, zoom)
+            extension = splitext(path)[1]
+            with open(path, 'rb') as f:
+                grid = formats[extension][0](f, region)
+                if extension in rule_formats:
+                    f.seek(0)
+                    rule = rule_formats[extension][0](f) or rule
+            gm = cls.set(grid, zoom)
+            if rule is not None:
+                gm.set_rule(rule)
+            return gm
         else:
-            raise FileExistsError('{}.gm does not exists'.format(file))
+            raise FileExistsError('{} does not exists'.format(file))
+
+    @classmethod
+    def convert(cls, gm: object) -> object:
+        """ Static Constructor, gets a GrowthMedium of any kind. Returns a GrowthMedium instance with the same state.
+
+        This method moves the visible grid, the initial state and the current evolution of gm in a new instance of this
+        class, so the evolution can go on with another model.
+
+        :param gm: the GrowthMedium to convert
+        :return the associated GrowthMedium instance
+        :type gm: GrowthMedium
+        :rtype: GrowthMedium
+
+        """
+        return cls()._load_from(gm)
+
+    def _load_from(self, gm: object) -> object:
+        if gm.rule != self.rule:
+            self.set_rule(gm.rule)
+        self.cur_zoom = gm.cur_zoom
+        self.cur_rows = gm.cur_rows
+        self.cur_cols = gm.cur_cols
+        self.rows_shift = gm.rows_shift
+        self.cols_shift = gm.cols_shift
+        self._set_init_grid(*gm._get_init_grid())
+        if gm.is_started():
+            self._set_state(*gm._get_state())
+        if gm._signatures_ring is not None:
+            self._signatures = dict(gm._signatures)
+            self._signatures_ring = deque(gm._signatures_ring, maxlen=gm._signatures_ring.maxlen)
+            self._cycle = gm._cycle
+        return self
+
+    @staticmethod
+    def _get_growth_medium_path(file: str) -> str:
+        """ Return the path of a stored GrowthMedium, the first existing format if file has not a known extension. """
+        path = '{}/growth_mediums/{}'.format(dirname(abspath(GameOfLife.__file__)), file)
+        if splitext(file)[1] in formats:
+            return path
+        for extension in formats:
+            if exists(path + extension):
+                return path + extension
+        return path + next(iter(formats))
 
     @staticmethod
     def exists_growth_medium(file: str) -> bool:
-        path = '{}/growth_mediums/{}.gm'.format(dirname(abspath(GameOfLife.__file__)), file)
-        return exists(path)
+        return GrowthMedium.catalog.exists(file)
 
     @staticmethod
     def get_growth_medium_files() -> list(str()):
         """ Get the list of GrowthMedium files stored.
 
-        This static method inspects the store directory in the GameOfLife package and returns the list of all
-        GrowthMedium files (.gm) stored.
+        This static method returns the list of all GrowthMedium files stored in the directory of the GameOfLife
+        package, in any format, without extension. The list comes from the catalog, which lists the directory only when
+        it changes.
 
         :return the list of GrowthMedium files names
         :rtype: list(str())
 
         """
-        path = '{}/growth_mediums'.format(dirname(abspath(GameOfLife.__file__)))
-        return sorted([x[0:-3] for x in listdir(path) if x.endswith('.gm')])
+        return GrowthMedium.catalog.get_names()
 
     def save(self, file: str) -> None:
         """ Save the current Growth Medium in a file.
 
         This method saves the current initial state of the GrowthMedium in the store directory of the GameOfLife package
-        with the file name chosen and the extension '.gm'.
+        with the file name chosen, in the format of its extension ('.gm' if it has not a known one), with the rule if
+        the format stores it.
         Furthermore check the presence of life and compress the space to the minimum rectangle with alive cells.
 
         :param file: the name of the file where the GrowthMedium will be saved
@@ -169,36 +242,112 @@ class GrowthMedium:
         :rtype: None
 
         """
-        path = '{}/growth_mediums/{}.gm'.format(dirname(abspath(GameOfLife.__file__)), file)
+        path = GrowthMedium._get_growth_medium_path(file)
         if not exists(path):
-            if len(self.cur_state_grid) == 0:
-                state_grid = self.init_grid
-            else:
-                state_grid = (self.cur_state_grid > 0) * 1
-            if sum(state_grid.ravel()) > 0:
-                _mr = _MR = _mc = _MC = 0
-                for i in range(self.cur_rows):
-                    for j in range(self.cur_cols):
-                        if state_grid[self.rows_shift+i, self.cols_shift+j] > 0:
-                            if _mr == 0 and _mc == 0:
-                                _mr = _MR = i
-                                _mc = _MC = j
-                            else:
-                                _mr = min(i, _mr)
-                                _MR = max(i, _MR)
-                                _mc = min(j, _mc)
-                                _MC = max(j, _MC)
-                rows = _MR - _mr + 1
-                cols = _MC - _mc + 1
-                grid = state_grid[self.rows_shift + _mr: self.rows_shift + _MR + 1,
-                                  self.cols_shift + _mc: self.cols_shift + _MC + 1].ravel()
-                with open(path, 'w+') as f:
-                    for i in range(rows):
-                        f.write(''.join(map(str, grid[i * cols:((i + 1) * cols)])) + '\n')
+            state_grid = (self._get_visible_grid().reshape(self.cur_rows, self.cur_cols) > 0) * 1
+            if state_grid.any():
+                _rows = nonzero(state_grid.any(axis=1))[0]
+                _cols = nonzero(state_grid.any(axis=0))[0]
+                grid = state_grid[_rows[0]:_rows[-1] + 1, _cols[0]:_cols[-1] + 1]
+                extension = splitext(path)[1]
+                with open(path, 'wb') as f:
+                    if extension in rule_formats:
+                        rule_formats[extension][1](f, grid, self.rule)
+                    else:
+                        formats[extension][1](f, grid)
+                GrowthMedium.catalog.invalidate()
             else:
                 raise ImportError('Empty initial state')
         else:
-            raise FileExistsError('{}.gm already exists'.format(file))
+            raise FileExistsError('{} already exists'.format(file))
+
+    @staticmethod
+    def _crop(grid: array([[]]), *grids: array([[]]), row: int = 0, col: int = 0) -> tuple:
+        """ Crop grid and the grids with the same shape to the alive cells of grid, returns them and the new (row, col). """
+        grid = array(grid)
+        _rows = nonzero(grid.any(axis=1))[0]
+        _cols = nonzero(grid.any(axis=0))[0]
+        if len(_rows) == 0:
+            return (grid[:1, :1] * 0, *(array(g)[:1, :1] * 0 for g in grids), row, col)
+        rs, cs = slice(_rows[0], _rows[-1] + 1), slice(_cols[0], _cols[-1] + 1)
+        return (grid[rs, cs].copy(), *(array(g)[rs, cs].copy() for g in grids), row + _rows[0], col + _cols[0])
+
+    def get_checkpoint(self, t: int) -> dict:
+        """ Return a snapshot of the whole simulation at time t, it does not share memory with the GrowthMedium.
+
+        The snapshot holds the engine name, the time, the viewport (zoom, rows, cols, rows_shift, cols_shift), the initial
+        state as (grid, row, col) and the current state as (state_grid, lifetime, row, col), None if not started. The
+        grids are cropped to the alive cells, so taking it is cheap enough to be done while the evolution runs.
+
+        :param t: the time of the current state
+        :return the snapshot accepted by write_checkpoint
+        :type t: int
+        :rtype: dict
+
+        """
+        grid, row, col = self._get_init_grid()
+        state = None
+        if self.is_started():
+            state_grid, lifetime, _row, _col = self._get_state()
+            state = self._crop(state_grid, lifetime, row=_row, col=_col)
+        return {'engine': type(self).__name__, 't': t, 'rule': self.rule,
+                'viewport': (self.cur_zoom, self.cur_rows, self.cur_cols, self.rows_shift, self.cols_shift),
+                'init': self._crop(grid, row=row, col=col), 'state': state}
+
+    @staticmethod
+    def write_checkpoint(file: str, checkpoint: dict) -> None:
+        """ Write a snapshot returned by get_checkpoint in file, replacing it only once completely written. """
+        with open(file + '.tmp', 'wb') as f:
+            write_checkpoint(f, checkpoint)
+        replace(file + '.tmp', file)
+
+    def checkpoint(self, file: str, t: int) -> None:
+        """ Save the whole simulation at time t in file.
+
+        Unlike save, the checkpoint keeps the current state with the lifetime of each cell, the initial state and the
+        viewport, in a compressed file at any path, so the evolution can be resumed exactly where it was.
+
+        :param file: the path of the checkpoint
+        :param t: the time of the current state
+        :return this method has no return
+        :type file: str
+        :type t: int
+        :rtype: None
+
+        """
+        self.write_checkpoint(file, self.get_checkpoint(t))
+
+    @classmethod
+    def resume(cls, file: str) -> tuple:
+        """ Static Constructor, gets the path of a checkpoint. Returns the GrowthMedium instance and its time.
+
+        The checkpoint can be resumed by any GrowthMedium class, not only by the one which wrote it. The caches of the
+        engine are rebuilt from the restored state and the cycle detection starts again from it, the next generation to
+        calculate is at the returned time + 1.
+
+        :param file: the path of the checkpoint
+        :return the pair (GrowthMedium, t)
+        :type file: str
+        :rtype: tuple
+
+        """
+        if not exists(file):
+            raise FileExistsError('{} does not exists'.format(file))
+        with open(file, 'rb') as f:
+            checkpoint = read_checkpoint(f)
+        return cls.from_checkpoint(checkpoint), checkpoint['t']
+
+    @classmethod
+    def from_checkpoint(cls, checkpoint: dict) -> object:
+        """ Static Constructor, gets a snapshot returned by get_checkpoint. Returns a GrowthMedium instance. """
+        gm = cls()
+        if checkpoint.get('rule', gm.rule) != gm.rule:
+            gm.set_rule(checkpoint['rule'])
+        gm.cur_zoom, gm.cur_rows, gm.cur_cols, gm.rows_shift, gm.cols_shift = checkpoint['viewport']
+        gm._set_init_grid(*checkpoint['init'])
+        if checkpoint['state'] is not None:
+            gm._set_state(*checkpoint['state'])
+        return gm
 
     def __copy__(self) -> object:
         """ Make a copy of the GrowthMedium.
@@ -211,17 +360,91 @@ class GrowthMedium:
         :rtype: GrowthMedium
 
         """
-        gm = GrowthMedium()
+        gm = type(self)()
+        if self.rule != gm.rule:
+            gm.set_rule(self.rule)
         gm.cur_zoom = self.cur_zoom
         gm.cur_rows = self.cur_rows
         gm.cur_cols = self.cur_cols
         gm.rows_shift = self.rows_shift
         gm.cols_shift = self.cols_shift
-        gm.init_grid = (self.cur_state_grid > 0) * 1
-        gm.sml_flat_earth_fallen = self.sml_flat_earth_fallen
-        gm.big_flat_earth_fallen = self.big_flat_earth_fallen
+        state_grid, _, row, col = self._get_state()
+        gm._set_init_grid((state_grid > 0) * 1, row, col)
         return gm
 
+    #
+    #               Grid Storage
+    #
+
+    @staticmethod
+    def _paste(grid: array([[]]), values: array([[]]), row: int, col: int) -> None:
+        """ Copy values in grid with the top left cell in (row, col), the cells out of grid are ignored. """
+        r0, c0 = max(row, 0), max(col, 0)
+        r1, c1 = min(row + len(values), grid.shape[0]), min(col + len(values[0]), grid.shape[1])
+        if r0 < r1 and c0 < c1:
+            grid[r0:r1, c0:c1] = values[r0 - row:r1 - row, c0 - col:c1 - col]
+
+    def _set_init_grid(self, grid: array([[]]), row: int, col: int) -> None:
+        """ Store the initial state, grid is placed with the top left cell in (row, col). """
+        _tot_cols = self._min_cols * (self._max_zoom + 1)
+        _tot_rows = self._min_rows * (self._max_zoom + 1)
+
+        self.init_grid = zeros((_tot_rows, _tot_cols), dtype=self._state_dtype)
+        self._paste(self.init_grid, grid, row, col)
+
+        self.sml_flat_earth_fallen = zeros((_tot_rows, _tot_cols), dtype=bool)
+        self.sml_flat_earth_fallen[1:-1, 1:-1] = True
+
+        self.big_flat_earth_fallen = zeros((_tot_rows, _tot_cols), dtype=bool)
+        self.big_flat_earth_fallen[3:-3, 3:-3] = True
+
+    def _get_init_grid(self) -> tuple:
+        """ Return the initial state as the triple (grid, row, col) accepted by _set_init_grid. """
+        return self.init_grid, 0, 0
+
+    def _set_state(self, state_grid: array([[]]), lifetime: array([[]]), row: int, col: int) -> None:
+        """ Store the current state and lifetime, the grids are placed with the top left cell in (row, col). """
+        self.cur_state_grid = zeros(self.init_grid.shape, dtype=self._state_dtype)
+        self._paste(self.cur_state_grid, state_grid, row, col)
+        self.lifetime = zeros(self.init_grid.shape, dtype=self._lifetime_dtype)
+        self._paste(self.lifetime, self._clip_lifetime(lifetime), row, col)
+
+    def _get_state(self) -> tuple:
+        """ Return the current state as the tuple (state_grid, lifetime, row, col) accepted by _set_state. """
+        if not self.is_started():
+            return self.init_grid, self.init_grid * 0, 0, 0
+        return self.cur_state_grid, self.lifetime, 0, 0
+
+    def _toggle_init_cell(self, row: int, col: int) -> None:
+        """ Born or kill the cell in (row, col) of the initial state. """
+        self.init_grid[row, col] = (self.init_grid[row, col] + 1) % 2
+
+    def _get_visible_grid(self, init: bool = False) -> array([]):
+        """ Return the flat visible grid of the current state, or of the initial one if init or not started. """
+        grid = self.init_grid if init or not self.is_started() else self.cur_state_grid
+        return grid[self.rows_shift:self.rows_shift + self.cur_rows,
+                    self.cols_shift:self.cols_shift + self.cur_cols].ravel()
+
+    def _get_bounds(self) -> tuple:
+        """ Return the rectangle (top, left, bottom, right) with all the alive cells, None without life. """
+        grid = self._get_state()[0]
+        _rows = nonzero(grid.any(axis=1))[0]
+        _cols = nonzero(grid.any(axis=0))[0]
+        if len(_rows) == 0:
+            return None
+        return _rows[0], _cols[0], _rows[-1], _cols[-1]
+
+    def _get_alive_cells(self) -> tuple:
+        """ Return the pair (rows, cols) of the coordinates of the alive cells, in row major order. """
+        state_grid, _, row, col = self._get_state()
+        # the flat indices of a boolean grid are found several times faster than the 2D ones of the states
+        cells = flatnonzero(array(state_grid) > 0)
+        return cells // state_grid.shape[1] + row, cells % state_grid.shape[1] + col
+
+    def is_started(self) -> bool:
+        """ Return True if the evolution is started, i.e. the state at time 0 has been requested. """
+        return len(self.cur_state_grid) > 0
+
     #
     #               State Grid Getter And Setter
     #
@@ -240,37 +463,142 @@ class GrowthMedium:
         """
         _steady_state = False
         _extinction = False
+        _profiler = self.profiler
+        if _profiler is not None:
+            _start = perf_counter()
         if t == 0:
             self.cur_state_grid = self.init_grid
-            self.lifetime = array([[0] * self._min_cols * (self._max_zoom + 1)] * self._min_rows * (self._max_zoom + 1))
+            self.lifetime = zeros(self.init_grid.shape, dtype=self._lifetime_dtype)
         else:
             prev_state_grid = self.cur_state_grid
 
-            prev_alive = (self.cur_state_grid > 0) * 1
-
-            cur_neighbors = convolve2d(prev_alive, self._neighbors_filter, mode='same')
-            cur_alive_map = (((cur_neighbors == 2) * (prev_alive > 0)) + (cur_neighbors == 3))
+            cur_alive_map = self._get_alive_map(t)
+            if _profiler is not None:
+                _start = _profiler.lap('neighbors', _start)
             if t % 10 == 0:
-                self.lifetime = cur_alive_map * (self.lifetime + 1) * self.big_flat_earth_fallen
+                self.lifetime = self._grow_old(self.lifetime, cur_alive_map, self.big_flat_earth_fallen)
             elif t % 5 == 0:
-                self.lifetime = cur_alive_map * (self.lifetime + 1) * self.sml_flat_earth_fallen
+                self.lifetime = self._grow_old(self.lifetime, cur_alive_map, self.sml_flat_earth_fallen)
             else:
-                self.lifetime = cur_alive_map * (self.lifetime + 1)
+                self.lifetime = self._grow_old(self.lifetime, cur_alive_map)
+            if _profiler is not None:
+                _start = _profiler.lap('lifetime', _start)
 
-            self.cur_state_grid = ((self.lifetime > 0) * (self.lifetime < self._ancient_threshold) * 1) \
-                                    + ((self.lifetime >= self._ancient_threshold) * 2)
+            self.cur_state_grid = self._get_state_map(self.lifetime)
+            if _profiler is not None:
+                _start = _profiler.lap('states', _start)
 
-            hr = self._hidden_rows
-            hc = self._hidden_cols
-            if sum(sum(self.cur_state_grid[hr:-hr, hc:-hc])) > 0:
-                if (self.cur_state_grid[hr:-hr, hc:-hc] == prev_state_grid[hr:-hr, hc:-hc]).all():
-                    _steady_state = True
-                    self.cur_state_grid = (self.cur_state_grid > 0) * 2
-            else:
-                _extinction = True
+            _extinction, _steady_state = self._check_state_grid(prev_state_grid)
+            if _profiler is not None:
+                _start = _profiler.lap('check', _start)
+
+        grid = self._get_visible_grid()
+        if _profiler is not None:
+            _profiler.lap('viewport', _start)
+        return _extinction, _steady_state, grid
+
+    def get_population(self) -> int:
+        """ Return the number of alive cells in the whole grid.
+
+        :return the current number of alive cells
+        :rtype: int
+
+        """
+        return count_nonzero(self._get_state()[0])
+
+    def get_density(self) -> float:
+        """ Return the fraction of alive cells.
+
+        The density is calculated on the whole grid when it is bounded, on the rectangle with all the alive cells
+        otherwise.
+
+        :return the current density of alive cells
+        :rtype: float
+
+        """
+        if self._bounded:
+            return self.get_population() / (self._min_rows * (self._max_zoom + 1) * self._min_cols * (self._max_zoom + 1))
+        bounds = self._get_bounds()
+        if bounds is None:
+            return 0.
+        return self.get_population() / ((bounds[2] - bounds[0] + 1) * (bounds[3] - bounds[1] + 1))
+
+    def _check_state_grid(self, prev_state_grid: array([[]])) -> tuple:
+        """ Check the current state against the previous one.
+
+        This method looks for extinction or steady state in the not hidden part of the grid, on steady state all the
+        alive cells become ancient.
+
+        :param prev_state_grid: the state grid of the previous generation
+        :return the pair (extinction, steady_state)
+        :type prev_state_grid: array([[]])
+        :rtype: tuple
+
+        """
+        _steady_state = False
+        _extinction = False
+        hr = self._hidden_rows
+        hc = self._hidden_cols
+        if self.cur_state_grid[hr:-hr, hc:-hc].any():
+            if (self.cur_state_grid[hr:-hr, hc:-hc] == prev_state_grid[hr:-hr, hc:-hc]).all():
+                _steady_state = True
+                self.cur_state_grid = (self.cur_state_grid > 0) * self._state_dtype(2)
+        else:
+            _extinction = True
+        return _extinction, _steady_state
+
+    def _get_alive_map(self, t: int) -> array([[]]):
+        """ Return the alive cells at time t.
+
+        This method applies the rule of the Game to the last state in memory: the neighbors of each cell are counted
+        with the center weighted 9, so the next state is a single gather from the lookup table of the rule.
+        Subclasses may override it to change how the next generation is calculated.
+
+        :param t: the time in which test the grid state
+        :return the 2D boolean array of the cells alive at time t
+        :type t: int
+        :rtype: array([[]])
+
+        """
+        prev_alive = self.cur_state_grid > 0
+
+        cur_neighbors = convolve2d(prev_alive.view(uint8), self._get_rule_kernel(), mode='same')
+        return self._rule_table[cur_neighbors]
+
+    def _get_rule_kernel(self) -> array([[]]):
+        """ Return _neighbors_filter in bytes with the center 9, it counts the index of each cell in _rule_table. """
+        kernel = array(self._neighbors_filter, dtype=uint8)
+        kernel[1, 1] = 9
+        return kernel
+
+    def _grow_old(self, lifetime: array([[]]), alive_map: array([[]]), fallen: array([[]]) = None) -> array([[]]):
+        """ Return the next lifetime: the alive cells grow old by one, saturating at _max_lifetime, the others are 0.
+
+        :param lifetime: the lifetime of the previous generation
+        :param alive_map: the cells alive in the next generation
+        :param fallen: the cells not erased with the hidden grid borders, if any
+        :return the new lifetime, of the type of lifetime
+        :type lifetime: array([[]])
+        :type alive_map: array([[]])
+        :type fallen: array([[]])
+        :rtype: array([[]])
 
-        return _extinction, _steady_state, self.cur_state_grid[self.rows_shift:self.rows_shift+self.cur_rows,
-                                                               self.cols_shift:self.cols_shift+self.cur_cols].ravel()
+        """
+        _lifetime = lifetime + (lifetime < self._max_lifetime)
+        multiply(_lifetime, alive_map, out=_lifetime, casting='unsafe')
+        if fallen is not None:
+            multiply(_lifetime, fallen, out=_lifetime, casting='unsafe')
+        return _lifetime
+
+    def _get_state_map(self, lifetime: array([[]])) -> array([[]]):
+        """ Return the states {0 -> dead, 1 -> alive, 2 -> ancient} of the cells from their lifetime, as bytes. """
+        state = (lifetime > 0).view(uint8)
+        state += lifetime >= self._ancient_threshold
+        return state
+
+    def _clip_lifetime(self, lifetime: array([[]])) -> array([[]]):
+        """ Return lifetime saturated at _max_lifetime, in the type of the lifetimes. """
+        return minimum(array(lifetime), self._max_lifetime).astype(self._lifetime_dtype)
 
     def update_init_grid_cell(self, i: int, j: int) -> array([[]]):
         """ Set a custom modification of current init grid.
@@ -287,10 +615,128 @@ class GrowthMedium:
         """
         if i < 0 or i >= self.cur_rows or j < 0 or j >= self.cur_cols:
             raise IndexError('Cell ({}, {}) out of feasible range'.format(i, j))
-        _state = self.init_grid[self.rows_shift + i, self.cols_shift + j]
-        self.init_grid[self.rows_shift + i, self.cols_shift + j] = (_state + 1) % 2
-        return self.init_grid[self.rows_shift:self.rows_shift+self.cur_rows,
-                              self.cols_shift:self.cols_shift+self.cur_cols].ravel()
+        self._toggle_init_cell(self.rows_shift + i, self.cols_shift + j)
+        return self._get_visible_grid(init=True)
+
+    #
+    #               Rule
+    #
+
+    def set_rule(self, rule: str) -> None:
+        """ Change the rule of the Game.
+
+        Any outer totalistic rule can be used, as a 'B/S' rulestring or by name (see Rules.rules), for example
+        'B36/S23' (HighLife) or 'Seeds'. The rule is compiled in a lookup table, so all the rules evolve at the same
+        speed. The cycle detection starts again.
+
+        :param rule: the rule
+        :return None
+        :type rule: str
+        :rtype: None
+
+        """
+        self._born, self._survive = parse_rule(rule)
+        self.rule = format_rule(self._born, self._survive)
+        self._rule_table = compile_rule(rule)
+        self._signatures_ring = None
+
+    #
+    #               Cycle Detection
+    #
+
+    def _get_signature(self, t: int) -> tuple:
+        """ Return the signature of the alive cells, independent of their position, with their top left corner.
+
+        In a bounded grid the borders are erased on regular times, so when some alive cell is on them the signature
+        depends also on the time in the erasing period.
+        The signature is the SHA-256 digest of the alive cells listed by _get_alive_cells, so different cells do not get
+        the same signature as with a 64 bit hash. It is computed again for each generation: it costs O(population) on
+        the sparse and tiled models and O(grid) on the dense ones, which evolve the whole grid anyway. Only the search
+        in the previous generations is O(1).
+
+        """
+        rows, cols = self._get_alive_cells()
+        if len(rows) == 0:
+            return None
+        top, left, bottom, right = rows[0], cols.min(), rows[-1], cols.max()
+        signature = sha256((rows - top).astype(uint32).tobytes())
+        signature.update((cols - left).astype(uint32).tobytes())
+        if self._bounded:
+            _tot_rows = self._min_rows * (self._max_zoom + 1)
+            _tot_cols = self._min_cols * (self._max_zoom + 1)
+            if top < 3 or left < 3 or bottom >= _tot_rows - 3 or right >= _tot_cols - 3:
+                signature.update(bytes([t % 10]))
+        return signature.digest(), int(top), int(left)
+
+    def get_cycle(self, t: int) -> tuple:
+        """ Look for the current state in the last generations.
+
+        This method stores the signature of the current state, the state at time t, in a history of the last
+        _cycle_history generations and looks for the same alive cells, even moved, in a previous generation.
+        If t = 0 the history is cleared.
+
+        :param t: the time of the current state
+        :return the pair (period, (rows_displacement, cols_displacement)) if the state repeats, None otherwise
+        :type t: int
+        :rtype: tuple
+
+        """
+        if t == 0 or self._signatures_ring is None:
+            self._signatures = {}
+            self._signatures_ring = deque(maxlen=self._cycle_history)
+            self._cycle = None
+        signature = self._get_signature(t)
+        if signature is None:
+            return None
+        key, top, left = signature
+
+        # the key is the whole digest, so a previous generation is found only with the same alive cells
+        seen = self._signatures.get(key)
+        if len(self._signatures_ring) == self._signatures_ring.maxlen:
+            old_key, old_t = self._signatures_ring[0]
+            if self._signatures[old_key][0] == old_t:
+                del self._signatures[old_key]
+        self._signatures_ring.append((key, t))
+        self._signatures[key] = (t, top, left)
+
+        if seen is None or seen[0] >= t:
+            return None
+        self._cycle = (t, t - seen[0], top - seen[1], left - seen[2])
+        return self._cycle[1], self._cycle[2:]
+
+    def fast_forward(self, t: int, generations: int) -> tuple:
+        """ Advance the evolution using the last cycle detected.
+
+        This method moves the current state, the state at time t, by the displacement of the cycle once for each whole
+        period in generations, the cells alive for the whole period grow old by it. Only the remaining generations are
+        calculated.
+
+        :param t: the time of the current state
+        :param generations: the generations to advance
+        :return the same of get_state_grid at time t + generations
+        :type t: int
+        :type generations: int
+        :rtype: tuple
+
+        """
+        if self._cycle is None or self._cycle[0] > t:
+            raise SystemError('no cycle detected')
+        _, period, drow, dcol = self._cycle
+        if self._bounded and (drow or dcol):
+            raise SystemError('can not move the state of a bounded grid')
+
+        cycles = generations // period
+        if cycles:
+            state_grid, lifetime, row, col = self._get_state()
+            lifetime = self._clip_lifetime(lifetime.astype(int64) + (lifetime >= period) * cycles * period)
+            self._set_state(self._get_state_map(lifetime), lifetime, row + cycles * drow, col + cycles * dcol)
+            t += cycles * period
+            self._cycle = (t, period, drow, dcol)
+
+        _result = False, False, self._get_visible_grid()
+        for _t in range(t + 1, t + generations % period + 1):
+            _result = self.get_state_grid(_t)
+        return _result
 
     #
     #               Move Visible Grid Methods
@@ -301,13 +747,19 @@ class GrowthMedium:
                  'rows': self.cur_rows,
                  'cols': self.cur_cols,
                  'hpos': (self.cols_shift + (self.cur_cols / 2) - (self._min_cols / 2)) / ((self._max_zoom) * self._min_cols),
-                 'vpos': (self.rows_shift + (self.cur_rows / 2) - (self._min_rows / 2)) / ((self._max_zoom) * self._min_rows)}
-        if len(self.cur_state_grid) == 0:
-            _data['grid'] = self.init_grid[self.rows_shift:self.rows_shift + self.cur_rows,
-                                           self.cols_shift:self.cols_shift + self.cur_cols].ravel()
-        else:
-            _data['grid'] = self.cur_state_grid[self.rows_shift:self.rows_shift + self.cur_rows,
-                                                self.cols_shift:self.cols_shift + self.cur_cols].ravel()
+                 'vpos': (self.rows_shift + (self.cur_rows / 2) - (self._min_rows / 2)) / ((self._max_zoom) * self._min_rows),
+                 'grid': self._get_visible_grid()}
+        if not self._bounded:
+            # the explorable grid is the starting one extended to all the alive cells and to the visible grid
+            top, left = min(0, self.rows_shift), min(0, self.cols_shift)
+            bottom = max(self._min_rows * (self._max_zoom + 1), self.rows_shift + self.cur_rows)
+            right = max(self._min_cols * (self._max_zoom + 1), self.cols_shift + self.cur_cols)
+            bounds = self._get_bounds()
+            if bounds is not None:
+                top, left = min(top, bounds[0]), min(left, bounds[1])
+                bottom, right = max(bottom, bounds[2] + 1), max(right, bounds[3] + 1)
+            _data['hpos'] = (self.cols_shift + (self.cur_cols / 2) - left) / (right - left)
+            _data['vpos'] = (self.rows_shift + (self.cur_rows / 2) - top) / (bottom - top)
         return _data
 
     def increase_state_grid_dimension(self) -> dict:
@@ -328,6 +780,10 @@ class GrowthMedium:
             self.cur_zoom += 1
             self.cur_rows += self._min_rows
             self.cur_cols += self._min_cols
+            if not self._bounded:
+                self.rows_shift -= int(self._min_rows / 2)
+                self.cols_shift -= int(self._min_cols / 2)
+                return self._get_grid_data()
             if self._min_rows <= self.rows_shift <= (self._min_rows * (self._max_zoom+1)) - self.cur_rows:
                 self.rows_shift -= int(self._min_rows / 2)
             else:
@@ -388,7 +844,7 @@ class GrowthMedium:
         :rtype: dict
 
         """
-        if self.cols_shift + self.cur_cols < self._min_cols * (self._max_zoom + 0.5):
+        if not self._bounded or self.cols_shift + self.cur_cols < self._min_cols * (self._max_zoom + 0.5):
             self.cols_shift += 1
         return self._get_grid_data()
 
@@ -406,7 +862,7 @@ class GrowthMedium:
         :rtype: dict
 
         """
-        if self.cols_shift > int(self._min_cols / 2):
+        if not self._bounded or self.cols_shift > int(self._min_cols / 2):
             self.cols_shift -= 1
         return self._get_grid_data()
 
@@ -425,7 +881,7 @@ class GrowthMedium:
         :rtype: dict
 
         """
-        if self.rows_shift > int(self._min_rows / 2):
+        if not self._bounded or self.rows_shift > int(self._min_rows / 2):
             self.rows_shift -= 1
         return self._get_grid_data()
 
@@ -444,6 +900,6 @@ class GrowthMedium:
         :rtype: dict
 
         """
-        if self.rows_shift + self.cur_rows < self._min_rows * (self._max_zoom + 0.5):
+        if not self._bounded or self.rows_shift + self.cur_rows < self._min_rows * (self._max_zoom + 0.5):
             self.rows_shift += 1
         return self._get_grid_data()
@@ -0,0 +1,49 @@
+from numpy import array, nonzero, result_type, zeros
+
+# Implementation of convolve2d: 'numpy' sums the shifted grids, 'scipy' uses scipy.signal, imported on first use
+backend = 'numpy'
+
+
+def convolve2d(grid: array([[]]), kernel: array([[]]), mode: str = 'full') -> array([[]]):
+    """ Convolve a grid with a small kernel, as scipy.signal.convolve2d with the default boundary (zeros outside).
+
+    The NumPy implementation adds, for each non zero entry of the kernel, the grid shifted by its position, so the
+    neighbors of a grid are counted with a few array additions and scipy is not needed. The result has the type of grid
+    and kernel together, counts in bytes wrap around as the scipy ones.
+
+    :param grid: the 2D grid
+    :param kernel: the 2D kernel
+    :param mode: 'full', 'same' or 'valid', see scipy.signal.convolve2d
+    :return the convolution
+    :type grid: array([[]])
+    :type kernel: array([[]])
+    :type mode: str
+    :rtype: array([[]])
+
+    """
+    if backend == 'scipy':
+        from scipy.signal import convolve2d as _convolve2d
+        return _convolve2d(grid, kernel, mode=mode)
+
+    kernel = array(kernel)
+    rows, cols = grid.shape
+    k_rows, k_cols = kernel.shape
+    if mode == 'full':
+        top, left, out_rows, out_cols = 0, 0, rows + k_rows - 1, cols + k_cols - 1
+    elif mode == 'same':
+        top, left, out_rows, out_cols = (k_rows - 1) // 2, (k_cols - 1) // 2, rows, cols
+    elif mode == 'valid':
+        top, left, out_rows, out_cols = k_rows - 1, k_cols - 1, max(rows - k_rows + 1, 0), max(cols - k_cols + 1, 0)
+    else:
+        raise ValueError('mode must be full, same or valid, not {}'.format(mode))
+
+    _type = result_type(grid, kernel)
+    padded = zeros((rows + 2 * (k_rows - 1), cols + 2 * (k_cols - 1)), dtype=_type)
+    padded[k_rows - 1:k_rows - 1 + rows, k_cols - 1:k_cols - 1 + cols] = grid
+    result = zeros((out_rows, out_cols), dtype=_type)
+    for i, j in zip(*nonzero(kernel)):
+        r = k_rows - 1 - i + top
+        c = k_cols - 1 - j + left
+        shifted = padded[r:r + out_rows, c:c + out_cols]
+        result += shifted if kernel[i, j] == 1 else shifted * kernel[i, j]
+    return result
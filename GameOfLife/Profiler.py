@@ -0,0 +1,115 @@
+from json import dumps
+from math import ceil, log2
+from threading import Lock
+from time import perf_counter
+import tracemalloc
+
+
+class Profiler:
+    """ Profiler collects the timings of the phases of the generations of a GrowthMedium.
+
+    A GrowthMedium with a profiler records the time of each phase of get_state_grid, profile runs a whole generation
+    recording its time and, if trace_memory, the bytes allocated by it as the peak of tracemalloc above the memory in
+    use before it. Any other measure, in seconds, can be recorded by name.
+    Each measure is kept as count, total, min, max and a histogram with power of 2 buckets, of microseconds for the
+    times and of bytes for the memory.
+
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self._lock = Lock()
+        # whether the tracing of the memory was started by profile, so only then close stops it
+        self._tracing = False
+        self.reset()
+
+    def reset(self) -> None:
+        """ Clear all the measures. """
+        self.generations = 0
+        self._stats = {}
+
+    #
+    #               Records
+    #
+
+    def _add(self, name: str, value: float, sample: float) -> None:
+        bucket = 2 ** max(int(ceil(log2(sample))), 0) if sample > 1 else 1
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = {'count': 0, 'total': 0., 'min': value, 'max': value, 'histogram': {}}
+            stats['count'] += 1
+            stats['total'] += value
+            stats['min'] = min(stats['min'], value)
+            stats['max'] = max(stats['max'], value)
+            stats['histogram'][bucket] = stats['histogram'].get(bucket, 0) + 1
+
+    def record(self, name: str, seconds: float) -> None:
+        """ Record a time of the measure name. """
+        self._add(name, seconds, seconds * 1e6)
+
+    def lap(self, phase: str, start: float) -> float:
+        """ Record the time passed from start for phase, returns the current time to start the next phase. """
+        now = perf_counter()
+        self.record(phase, now - start)
+        return now
+
+    def profile(self, gm: object, t: int) -> tuple:
+        """ Run a generation of a GrowthMedium recording its phases.
+
+        :param gm: the GrowthMedium to profile
+        :param t: the time of the generation
+        :return the same of get_state_grid
+        :type gm: GrowthMedium
+        :type t: int
+        :rtype: tuple
+
+        """
+        gm.profiler = self
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracing = True
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        start = perf_counter()
+        result = gm.get_state_grid(t)
+        self.record('generation', perf_counter() - start)
+        if self.trace_memory:
+            allocated = tracemalloc.get_traced_memory()[1] - before
+            self._add('allocated_bytes', allocated, allocated)
+        self.generations += 1
+        return result
+
+    def close(self) -> None:
+        """ Stop tracing the memory, if the tracing was started by profile. """
+        if self._tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._tracing = False
+
+    #
+    #               Reports
+    #
+
+    def get_stats(self) -> dict:
+        """ Return the measures.
+
+        :return a dict with the number of generations profiled and, for each measure, a dict with count, total, mean,
+                min, max and the histogram {bucket upper bound: count}
+        :rtype: dict
+
+        """
+        with self._lock:
+            measures = {}
+            for name, stats in self._stats.items():
+                measures[name] = dict(stats, mean=stats['total'] / stats['count'],
+                                      histogram={str(k): v for k, v in sorted(stats['histogram'].items())})
+        return {'generations': self.generations, 'measures': measures}
+
+    def dump(self, file: str = None) -> str:
+        """ Return the measures as JSON, writing them in file if given. """
+        text = dumps(self.get_stats(), indent=2)
+        if file is not None:
+            with open(file, 'w') as f:
+                f.write(text)
+        return text
@@ -0,0 +1,104 @@
+from numpy import arange, array, clip, full, intp, uint8, zeros
+from struct import pack
+from zlib import compress, crc32
+
+
+class Rasterizer:
+    """ Rasterizer draws a state grid in a RGBA image, it does not need any graphic library.
+
+    Each cell is a rectangle of cell_h x cell_w pixels colored by its state through the colors lookup table, cells are
+    separated, and surrounded, by lines of border pixels. The image rows go from the top to the bottom of the grid.
+
+    """
+
+    # Colors of the states {0 -> dead, 1 -> alive, 2 -> ancient} and of the borders, as (r, g, b, a) in [0, 1]
+    cell_color_state = [(0.2, 0.2, 0.2, 1), (0, 1, 0, .5), (1, 0, 0, .5)]
+    border_color = (0, 0, 0, 1)
+
+    def __init__(self, cell_h: int = 8, cell_w: int = 8, border: int = 1, colors: list = None,
+                 border_color: tuple = None):
+        self.cell_h = max(int(cell_h), 1)
+        self.cell_w = max(int(cell_w), 1)
+        self.border = max(int(border), 0)
+        colors = self.cell_color_state if colors is None else colors
+        border_color = self.border_color if border_color is None else border_color
+        self._lut = self._to_bytes(list(colors) + [border_color])
+        self._maps = {}
+
+    @staticmethod
+    def _to_bytes(colors: list) -> array([[]]):
+        return clip(array(colors, dtype=float) * 255 + .5, 0, 255).astype(uint8)
+
+    def _get_map(self, cells: int, size: int) -> array([]):
+        """ Return for each pixel along a side the index of its cell, cells for the border pixels. """
+        key = (cells, size)
+        if key not in self._maps:
+            pitch = size + self.border
+            pixel = arange(cells * pitch + self.border) - self.border
+            index = pixel // pitch
+            index[(pixel < 0) | (pixel % pitch >= size)] = cells
+            self._maps[key] = index
+        return self._maps[key]
+
+    def get_size(self, rows: int, cols: int) -> tuple:
+        """ Return the size (height, width) in pixels of the image of a grid. """
+        return rows * (self.cell_h + self.border) + self.border, cols * (self.cell_w + self.border) + self.border
+
+    def render(self, grid: array([]), rows: int, cols: int) -> array([[[]]]):
+        """ Draw a state grid.
+
+        :param grid: the flat or 2D state grid
+        :param rows: the rows of the grid
+        :param cols: the columns of the grid
+        :return the 3D array (height, width, 4) of the RGBA bytes of the image
+        :type grid: array([])
+        :type rows: int
+        :type cols: int
+        :rtype: array([[[]]])
+
+        """
+        border = len(self._lut) - 1
+        cells = full((rows + 1, cols + 1), border, dtype=intp)
+        cells[:rows, :cols] = array(grid).reshape(rows, cols)
+        return self._lut[cells[self._get_map(rows, self.cell_h)[:, None], self._get_map(cols, self.cell_w)[None, :]]]
+
+    def update(self, image: array([[[]]]), cols: int, indices: list, states: list) -> array([[[]]]):
+        """ Redraw in place only the given cells of an image.
+
+        :param image: the image returned by render
+        :param cols: the columns of the grid
+        :param indices: the indices of the cells in the flat grid
+        :param states: the new states of the cells
+        :return the updated image
+        :type image: array([[[]]])
+        :type cols: int
+        :type indices: list
+        :type states: list
+        :rtype: array([[[]]])
+
+        """
+        if len(indices) == 0:
+            return image
+        indices = array(indices)
+        top = (indices // cols) * (self.cell_h + self.border) + self.border
+        left = (indices % cols) * (self.cell_w + self.border) + self.border
+        ys = top[:, None, None] + arange(self.cell_h)[None, :, None]
+        xs = left[:, None, None] + arange(self.cell_w)[None, None, :]
+        image[ys, xs] = self._lut[array(states)][:, None, None, :]
+        return image
+
+    @staticmethod
+    def save(image: array([[[]]]), file: str) -> None:
+        """ Write an image returned by render in a PNG file. """
+        height, width = image.shape[:2]
+        raw = zeros((height, width * 4 + 1), dtype=uint8)
+        raw[:, 1:] = image.reshape(height, width * 4)
+
+        def chunk(kind: bytes, data: bytes) -> bytes:
+            return pack('>I', len(data)) + kind + data + pack('>I', crc32(kind + data) & 0xffffffff)
+
+        with open(file, 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n')
+            f.write(chunk(b'IHDR', pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)))
+            f.write(chunk(b'IDAT', compress(raw.tobytes())))
+            f.write(chunk(b'IEND', b''))
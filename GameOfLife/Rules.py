@@ -0,0 +1,67 @@
+from numpy import array, zeros
+from re import fullmatch
+
+# Some outer totalistic rules by name
+rules = {'Conway': 'B3/S23',
+         'HighLife': 'B36/S23',
+         'Seeds': 'B2/S',
+         'Day & Night': 'B3678/S34678',
+         'Life Without Death': 'B3/S012345678',
+         'Maze': 'B3/S12345',
+         'Morley': 'B368/S245',
+         '2x2': 'B36/S125',
+         'Diamoeba': 'B35678/S5678',
+         'Replicator': 'B1357/S1357'}
+
+
+def parse_rule(rule: str) -> tuple:
+    """ Parse an outer totalistic rule.
+
+    The rule is a name in rules or a rulestring as 'B3/S23', both in any case, with B and S in any order, or as the
+    classic 'S/B' '23/3'.
+    Rules with birth on 0 neighbors are refused: they would fill the unbounded universe at every generation.
+
+    :param rule: the rule
+    :return the pair (born, survive) of the sorted tuples of neighbors counts
+    :type rule: str
+    :rtype: tuple
+
+    """
+    names = {name.lower(): rulestring for name, rulestring in rules.items()}
+    text = names.get(rule.strip().lower(), rule).strip().upper()
+    bs = fullmatch(r'B([0-8]*)/?S([0-8]*)', text) or fullmatch(r'S([0-8]*)/?B([0-8]*)', text)
+    if bs is not None:
+        born, survive = (bs[1], bs[2]) if text.startswith('B') else (bs[2], bs[1])
+    else:
+        classic = fullmatch(r'([0-8]*)/([0-8]*)', text)
+        if classic is None:
+            raise SyntaxError('Wrong rule {}'.format(rule))
+        survive, born = classic[1], classic[2]
+    if '0' in born:
+        raise SyntaxError('Rules with birth on 0 neighbors are not supported: {}'.format(rule))
+    return tuple(sorted({int(n) for n in born})), tuple(sorted({int(n) for n in survive}))
+
+
+def format_rule(born: tuple, survive: tuple) -> str:
+    """ Return the canonical 'B/S' rulestring of born and survive. """
+    return 'B{}/S{}'.format(''.join(map(str, born)), ''.join(map(str, survive)))
+
+
+def compile_rule(rule: str) -> array([]):
+    """ Compile an outer totalistic rule in its lookup table.
+
+    The table has 18 entries: the cell with n alive neighbors is alive in the next generation if the entry n, when it is
+    dead, or 9 + n, when it is alive, is True. So a whole grid is evolved with a single gather from the table of the
+    neighbors counted with the center of the filter set to 9.
+
+    :param rule: the rule, see parse_rule
+    :return the boolean table
+    :type rule: str
+    :rtype: array([])
+
+    """
+    born, survive = parse_rule(rule)
+    table = zeros(18, dtype=bool)
+    table[list(born)] = True
+    table[[9 + n for n in survive]] = True
+    return table
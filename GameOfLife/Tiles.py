@@ -0,0 +1,337 @@
+from .Models import GrowthMedium
+from .Neighbors import convolve2d
+from itertools import product
+from numpy import array, concatenate, flatnonzero, iinfo, int64, lexsort, minimum, nonzero, repeat, stack, uint8, \
+    zeros
+from time import perf_counter
+
+
+class _Tile:
+    """ _Tile represents a square of the universe with the state and the lifetime of its cells
+
+    A tile not evaluated in a generation keeps its cells, so its lifetime is updated lazily: idle counts the
+    generations passed since lifetime was stored and young tells if some cell can still become ancient.
+    The alive cells of a tile never change, only their state, so their flat indices are cached in cells when needed.
+
+    """
+    __slots__ = ('state', 'lifetime', 'idle', 'young', 'cells')
+
+    def __init__(self, state: array([[]]), lifetime: array([[]]), young: bool = None):
+        self.state = state
+        self.lifetime = lifetime
+        self.idle = 0
+        self.young = bool((state == 1).any()) if young is None else young
+        self.cells = None
+
+    def get_cells(self) -> array([]):
+        if self.cells is None:
+            self.cells = flatnonzero(self.state)
+        return self.cells
+
+    def get_lifetime(self) -> array([[]]):
+        if self.idle:
+            # the lifetime saturates at the maximum of its type
+            top = int(iinfo(self.lifetime.dtype).max)
+            self.lifetime = self.lifetime + minimum(top - self.lifetime, min(self.idle, top)) * (self.state > 0)
+            self.idle = 0
+        return self.lifetime
+
+
+class TiledGrowthMedium(GrowthMedium):
+    """ TiledGrowthMedium represents a model of the Game Of Life in an unbounded universe.
+
+    The universe is split in square tiles of _tile_size cells, indexed by their position (row // size, col // size).
+    A tile is allocated when the life reaches it and released when all its cells are dead, so no part of the universe
+    is ever erased. The visible grid, rows_shift and cols_shift are in the coordinates of the universe.
+    Only the tiles next to a tile changed in the last generation are evaluated, the others can not change.
+
+    """
+
+    _bounded = False
+
+    _tile_size = 32
+
+    # Alive cells of the initial state and current tiles, {(tile_row, tile_col): cells}
+    _init_tiles = {}
+    _tiles = None
+
+    # Tiles whose alive cells changed in the last generation and tiles statistics
+    _dirty = set()
+    _tile_stats = {}
+
+    #
+    #               Tiles Helpers
+    #
+
+    def _split(self, grid: array([[]]), row: int, col: int) -> dict:
+        """ Split grid, with the top left cell in (row, col), in the tiles which contain at least an alive cell. """
+        size = self._tile_size
+        tiles = {}
+        rows, cols = nonzero(grid)
+        for key in set(zip(((rows + row) // size).tolist(), ((cols + col) // size).tolist())):
+            tile = zeros((size, size), dtype=grid.dtype)
+            self._paste(tile, grid, row - key[0] * size, col - key[1] * size)
+            tiles[key] = tile
+        return tiles
+
+    def _join(self, tiles: dict) -> tuple:
+        """ Join tiles in a grid, returns the triple (grid, row, col) with the top left cell in (row, col). """
+        size = self._tile_size
+        if not tiles:
+            return zeros((1, 1), dtype=self._state_dtype), 0, 0
+        top = min(key[0] for key in tiles)
+        left = min(key[1] for key in tiles)
+        bottom = max(key[0] for key in tiles)
+        right = max(key[1] for key in tiles)
+        grid = zeros(((bottom - top + 1) * size, (right - left + 1) * size), dtype=next(iter(tiles.values())).dtype)
+        for (i, j), tile in tiles.items():
+            grid[(i - top) * size:(i - top + 1) * size, (j - left) * size:(j - left + 1) * size] = tile
+        return grid, top * size, left * size
+
+    def _get_tiles(self, init: bool = False) -> dict:
+        """ Return the state of each tile, of the initial state if init or not started. """
+        if init or not self.is_started():
+            return self._init_tiles
+        return {key: tile.state for key, tile in self._tiles.items()}
+
+    def _get_cells(self) -> dict:
+        """ Return the flat indices of the alive cells of each tile, of the initial state if not started. """
+        if not self.is_started():
+            return {key: flatnonzero(tile) for key, tile in self._init_tiles.items()}
+        return {key: tile.get_cells() for key, tile in self._tiles.items()}
+
+    #
+    #               Grid Storage
+    #
+
+    def _set_init_grid(self, grid: array([[]]), row: int, col: int) -> None:
+        self._init_tiles = self._split((array(grid) > 0).astype(self._state_dtype), row, col)
+
+    def _get_init_grid(self) -> tuple:
+        return self._join(self._init_tiles)
+
+    def _set_state(self, state_grid: array([[]]), lifetime: array([[]]), row: int, col: int) -> None:
+        size = self._tile_size
+        states = self._split(array(state_grid).astype(self._state_dtype), row, col)
+        lifetime = self._clip_lifetime(lifetime)
+        self._tiles = {}
+        for key, state in states.items():
+            _lifetime = zeros((size, size), dtype=self._lifetime_dtype)
+            self._paste(_lifetime, lifetime, row - key[0] * size, col - key[1] * size)
+            self._tiles[key] = _Tile(state, _lifetime * (state > 0))
+        self._dirty = set(self._tiles)
+
+    def set_rule(self, rule: str) -> None:
+        super().set_rule(rule)
+        self._dirty = set(self._tiles or ())
+
+    def _get_state(self) -> tuple:
+        if not self.is_started():
+            grid, row, col = self._get_init_grid()
+            return grid, grid * 0, row, col
+        state_grid, row, col = self._join(self._get_tiles())
+        lifetime = self._join({key: tile.get_lifetime() for key, tile in self._tiles.items()})[0]
+        return state_grid, lifetime, row, col
+
+    def _toggle_init_cell(self, row: int, col: int) -> None:
+        size = self._tile_size
+        key = (row // size, col // size)
+        if key not in self._init_tiles:
+            self._init_tiles = dict(self._init_tiles)
+            self._init_tiles[key] = zeros((size, size), dtype=self._state_dtype)
+        tile = self._init_tiles[key]
+        tile[row % size, col % size] = (tile[row % size, col % size] + 1) % 2
+        if not tile.any():
+            del self._init_tiles[key]
+
+    def _get_visible_grid(self, init: bool = False) -> array([]):
+        size = self._tile_size
+        tiles = self._get_tiles(init)
+        grid = zeros((self.cur_rows, self.cur_cols), dtype=self._state_dtype)
+        for i in range(self.rows_shift // size, (self.rows_shift + self.cur_rows - 1) // size + 1):
+            for j in range(self.cols_shift // size, (self.cols_shift + self.cur_cols - 1) // size + 1):
+                if (i, j) in tiles:
+                    self._paste(grid, tiles[(i, j)], i * size - self.rows_shift, j * size - self.cols_shift)
+        return grid.ravel()
+
+    def _get_bounds(self) -> tuple:
+        # each tile has alive cells, so only the tiles on the sides of the tiles' rectangle are looked at
+        size = self._tile_size
+        cells = self._get_cells()
+        if not cells:
+            return None
+        top = min(key[0] for key in cells)
+        left = min(key[1] for key in cells)
+        bottom = max(key[0] for key in cells)
+        right = max(key[1] for key in cells)
+        return (top * size + min(int(c[0]) // size for key, c in cells.items() if key[0] == top),
+                left * size + min(int((c % size).min()) for key, c in cells.items() if key[1] == left),
+                bottom * size + max(int(c[-1]) // size for key, c in cells.items() if key[0] == bottom),
+                right * size + max(int((c % size).max()) for key, c in cells.items() if key[1] == right))
+
+    def _get_alive_cells(self) -> tuple:
+        size = self._tile_size
+        cells = self._get_cells()
+        if not cells:
+            return zeros(0, dtype=int64), zeros(0, dtype=int64)
+        counts = [len(c) for c in cells.values()]
+        flat = concatenate(list(cells.values()))
+        rows = flat // size + repeat(array([key[0] for key in cells], dtype=int64) * size, counts)
+        cols = flat % size + repeat(array([key[1] for key in cells], dtype=int64) * size, counts)
+        order = lexsort((cols, rows))
+        return rows[order], cols[order]
+
+    def is_started(self) -> bool:
+        return self._tiles is not None
+
+    def get_population(self) -> int:
+        return sum(len(c) for c in self._get_cells().values())
+
+    #
+    #               State Grid Getter
+    #
+
+    def get_tile_stats(self) -> dict:
+        """ Return the tiles statistics.
+
+        :return return a dict with the statistics of the last generation and their totals:
+                * **tiles**: the number of allocated tiles
+                * **evaluated**: the number of tiles evaluated
+                * **skipped**: the number of allocated tiles not evaluated
+                * **total_evaluated**: the number of tiles evaluated from time 0
+                * **total_skipped**: the number of tiles not evaluated from time 0
+        :rtype: dict
+
+        """
+        return dict(self._tile_stats)
+
+    def get_state_grid(self, t: int) -> array([[]]):
+        """ Return the updated state.
+
+        This method calculates che new grid state from the last one in memory, if t = 0 it will load the initial state.
+        Only the tiles next to the ones changed in the last generation are evaluated, the others are skipped.
+
+        :param t: the time in which test the grid state
+        :return the 2D array with the updated cells' state {0 -> dead, 1 -> alive, 2 -> ancient}
+        :type t: int
+        :rtype: array([[]])
+
+        """
+        _steady_state = False
+        _extinction = False
+        _profiler = self.profiler
+        if _profiler is not None:
+            _start = perf_counter()
+        if t == 0:
+            self._tiles = {key: _Tile(tile.copy(), zeros(tile.shape, dtype=self._lifetime_dtype))
+                           for key, tile in self._init_tiles.items()}
+            self._dirty = set(self._tiles)
+            self._tile_stats = {'tiles': len(self._tiles), 'evaluated': 0, 'skipped': 0,
+                                'total_evaluated': 0, 'total_skipped': 0}
+        else:
+            prev_tiles = self._tiles
+            keys = list({(i + di, j + dj) for i, j in self._dirty for di in (-1, 0, 1) for dj in (-1, 0, 1)})
+            evaluate = set(keys)
+
+            cur_alive_map, prev_alive_map = self._get_tiles_alive_map(prev_tiles, keys)
+            if _profiler is not None:
+                _start = _profiler.lap('neighbors', _start)
+
+            # the tiles evaluated are updated together, the missing ones as tiles without life
+            prev_state = zeros(cur_alive_map.shape, dtype=self._state_dtype)
+            lifetime = zeros(cur_alive_map.shape, dtype=self._lifetime_dtype)
+            for n, key in enumerate(keys):
+                prev_tile = prev_tiles.get(key)
+                if prev_tile is not None:
+                    prev_state[n] = prev_tile.state
+                    lifetime[n] = prev_tile.get_lifetime()
+            lifetime = self._grow_old(lifetime, cur_alive_map)
+            state = self._get_state_map(lifetime)
+            changed = (cur_alive_map != prev_alive_map).any(axis=(1, 2))
+            populated = cur_alive_map.any(axis=(1, 2))
+            young = (state == 1).any(axis=(1, 2))
+            _state_changed = bool((state != prev_state).any())
+
+            self._tiles = dict(prev_tiles)
+            self._dirty = set()
+            for n, key in enumerate(keys):
+                if changed[n]:
+                    self._dirty.add(key)
+                if populated[n]:
+                    self._tiles[key] = _Tile(state[n].copy(), lifetime[n].copy(), bool(young[n]))
+                elif key in self._tiles:
+                    del self._tiles[key]
+            if _profiler is not None:
+                _start = _profiler.lap('states', _start)
+
+            skipped = 0
+            for key, tile in self._tiles.items():
+                if key not in evaluate:
+                    skipped += 1
+                    tile.idle += 1
+                    if tile.young:
+                        state = self._get_state_map(tile.get_lifetime())
+                        if not (state == tile.state).all():
+                            _state_changed = True
+                            tile.state = state
+                            tile.young = bool((state == 1).any())
+
+            if _profiler is not None:
+                _start = _profiler.lap('idle', _start)
+
+            self._tile_stats = {'tiles': len(self._tiles), 'evaluated': len(evaluate), 'skipped': skipped,
+                                'total_evaluated': self._tile_stats.get('total_evaluated', 0) + len(evaluate),
+                                'total_skipped': self._tile_stats.get('total_skipped', 0) + skipped}
+
+            if self._tiles:
+                if not self._dirty and not _state_changed:
+                    _steady_state = True
+                    for tile in self._tiles.values():
+                        tile.state = (tile.state > 0) * self._state_dtype(2)
+                        tile.young = False
+            else:
+                _extinction = True
+            if _profiler is not None:
+                _start = _profiler.lap('check', _start)
+
+        grid = self._get_visible_grid()
+        if _profiler is not None:
+            _profiler.lap('viewport', _start)
+        return _extinction, _steady_state, grid
+
+    def _get_tiles_alive_map(self, tiles: dict, keys: list) -> tuple:
+        """ Return the alive cells of the tiles keys in the next generation, with their alive cells in the last one.
+
+        The window of each tile, with the borders of its neighbors, is gathered at once from the stack of the tiles
+        around all of them; the windows are then put one under the other, so the neighbors of all the tiles are counted
+        by a single convolution and the rows across two windows are dropped.
+
+        :param tiles: the tiles of the last generation
+        :param keys: the keys of the tiles to evaluate
+        :return the pair (alive, prev_alive) of boolean arrays with shape (len(keys), _tile_size, _tile_size)
+        :type tiles: dict
+        :type keys: list
+        :rtype: tuple
+
+        """
+        size = self._tile_size
+        around = list({(i + di, j + dj) for i, j in keys for di in (-1, 0, 1) for dj in (-1, 0, 1)} & tiles.keys())
+        index = {key: n for n, key in enumerate(around)}
+        # the last tile of alive has no life, it is the neighbor missing (index -1)
+        alive = zeros((len(around) + 1, size, size), dtype=bool)
+        if around:
+            alive[:-1] = stack([tiles[key].state for key in around]) > 0
+
+        # the last window is left empty, so the convolution has rows for the whole last window
+        window = zeros((len(keys) + 1, size + 2, size + 2), dtype=uint8)
+        _src = {-1: slice(size - 1, size), 0: slice(0, size), 1: slice(0, 1)}
+        _dst = {-1: slice(0, 1), 0: slice(1, size + 1), 1: slice(size + 1, size + 2)}
+        around_offsets = list(product((-1, 0, 1), repeat=2))
+        neighbors = array([[index.get((i + di, j + dj), -1) for di, dj in around_offsets] for i, j in keys],
+                          dtype=int64).reshape(-1, 9)
+        for n, (di, dj) in enumerate(around_offsets):
+            window[:-1, _dst[di], _dst[dj]] = alive[neighbors[:, n], _src[di], _src[dj]]
+
+        counts = convolve2d(window.reshape(-1, size + 2), self._get_rule_kernel(), mode='valid')
+        counts = counts[:len(keys) * (size + 2)].reshape(len(keys), size + 2, size)[:, :size]
+        return self._rule_table[counts], window[:-1, 1:-1, 1:-1] > 0
@@ -1,18 +1,21 @@
 import GameOfLife
 from .Controllers import GrowthMediumCTRL
+from .Rasterizer import Rasterizer
 from kivy.clock import Clock
 from kivy.core.window import Window
 from kivy.factory import Factory
 from kivy.graphics import Color,  Rectangle
 from kivy.graphics.instructions import InstructionGroup
+from kivy.graphics.texture import Texture
 from kivy.lang import Builder
-from kivy.properties import NumericProperty, ListProperty
+from kivy.properties import NumericProperty, ListProperty, ObjectProperty
 from kivy.uix.button import Button
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.label import Label
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.textinput import TextInput
 from kivy.uix.popup import Popup
+from numpy import array, flatnonzero
 from os.path import dirname, abspath
 
 #
@@ -107,9 +110,10 @@ class GrowthMediumSurface(Label):
     evolution. Starting from single cell's state's color to continue with current grid view, its size and its position.
 
     """
-    # Current cells' state
+    # Current cells' state, changes from the old one as (indices, states) or None to compare all cells
     cells = ListProperty()
     old_cells = []
+    delta = ObjectProperty(None, allownone=True)
 
     # Position and dimension information's
     cell_rows = NumericProperty()
@@ -132,10 +136,14 @@ class GrowthMediumSurface(Label):
     vbar_w = 3
     vbar_h = NumericProperty()
 
-    # Canvas objects
-    cells_canvas = []
+    # Canvas objects, the cells are drawn in a single texture
+    cells_canvas = None
     bars_canvas = []
 
+    # Rasterizer of the cells and the image of the current cells
+    rasterizer = None
+    image = None
+
     # Colors
     bars_color = (0, 0, 1, .8)
     cell_color_state = [(0.2, 0.2, 0.2, 1), (0, 1, 0, .5), (1, 0, 0, .5)]
@@ -221,6 +229,11 @@ class GrowthMediumSurface(Label):
             self.ctrl.move_down()
         elif keycode[1] == 'd':
             self.ctrl.move_right()
+        elif keycode[1] == 't':
+            self.ctrl.toggle_turbo()
+        elif keycode[1] == 'b':
+            if self.ctrl.round > 0 and not self.ctrl.custom_gm:
+                self.ctrl.step_back()
         if keycode[1] in ['up', 'down', 'left', 'right', 'w', 'a', 's', 'd']:
             self._draw_bars()
 
@@ -250,19 +263,19 @@ class GrowthMediumSurface(Label):
 
     def _schedule_redraw(self, *args):
         self.canvas.clear()
-        self.cells_canvas = [None] * len(self.cells)
-        for i in range(self.cell_rows):
-            for j in range(self.cell_cols):
-                pos = j + (self.cell_rows - i - 1) * self.cell_cols
-                cell = InstructionGroup()
-                cell.add(Color(*self.cell_color_state[self.cells[pos]]))
-                cell.add(Rectangle(
-                            pos=(
-                                j * (self.cell_size_w + 1) + self.border_w,
-                                i * (self.cell_size_h + 1) + self.border_h
-                            ), size=(self.cell_size_w, self.cell_size_h)))
-                self.cells_canvas[pos] = cell
-                self.canvas.add(cell)
+        self.rasterizer = Rasterizer(round(self.cell_size_h), round(self.cell_size_w),
+                                     colors=self.cell_color_state, border_color=(0, 0, 0, 0))
+        self.image = self.rasterizer.render(self.cells, int(self.cell_rows), int(self.cell_cols))
+        texture = Texture.create(size=(self.image.shape[1], self.image.shape[0]), colorfmt='rgba')
+        texture.mag_filter = texture.min_filter = 'nearest'
+        texture.flip_vertical()
+        self._blit(texture)
+        self.canvas.add(Color(1, 1, 1, 1))
+        self.cells_canvas = Rectangle(
+                    texture=texture,
+                    pos=(self.border_w - 1, self.border_h - 1),
+                    size=(self.cell_cols * (self.cell_size_w + 1) + 1, self.cell_rows * (self.cell_size_h + 1) + 1))
+        self.canvas.add(self.cells_canvas)
         if not self._first_draw:
             self._draw_bars()
         else:
@@ -289,20 +302,21 @@ class GrowthMediumSurface(Label):
         self.canvas.add(hbar)
 
     def _draw_update(self):
-        for i in range(self.cell_rows):
-            for j in range(self.cell_cols):
-                pos = j + (self.cell_rows - i - 1) * self.cell_cols
-                if self.cells[pos] != self.old_cells[pos]:
-                    new_cell = InstructionGroup()
-                    new_cell.add(Color(*self.cell_color_state[self.cells[j + (self.cell_rows - i - 1) * self.cell_cols]]))
-                    new_cell.add(Rectangle(
-                                pos=(
-                                    j * (self.cell_size_w + 1) + self.border_w,
-                                    i * (self.cell_size_h + 1) + self.border_h
-                                ), size=(self.cell_size_w, self.cell_size_h)))
-                    self.canvas.remove(self.cells_canvas[pos])
-                    self.cells_canvas[pos] = new_cell
-                    self.canvas.add(new_cell)
+        if self.image is None:
+            self._redraw()
+            return
+        if self.delta is not None:
+            indices, states = self.delta
+        else:
+            cells = array(self.cells)
+            indices = flatnonzero(cells != array(self.old_cells))
+            states = cells[indices]
+        self.rasterizer.update(self.image, int(self.cell_cols), indices, states)
+        self._blit(self.cells_canvas.texture)
+        self.canvas.ask_update()
+
+    def _blit(self, texture):
+        texture.blit_buffer(self.image.tobytes(), colorfmt='rgba', bufferfmt='ubyte')
 
 
 #
@@ -374,4 +388,8 @@ class FileCtrl(GridLayout):
         self.ctrl = grid_ctrl
         super(FileCtrl, self).__init__(**kwargs)
         for file in self.ctrl.get_growth_medium_files():
-            self.add_widget(Factory.FileCtrlBtn(self.ctrl, text=file))
+            info = self.ctrl.get_growth_medium_info(file)
+            text = file
+            if info is not None and 'error' not in info:
+                text = '{}  ({}x{}, {} cells)'.format(file, info['rows'], info['cols'], info['population'])
+            self.add_widget(Factory.FileCtrlBtn(self.ctrl, file=file, text=text))
@@ -1 +1,21 @@
-from .Game import Game
+# Module of the public classes, imported on first use: Game needs Kivy, the models can be used without a display
+_lazy = {'Game': 'Game',
+         'GrowthMediumCTRL': 'Controllers',
+         'GrowthMedium': 'Models',
+         'BitGrowthMedium': 'Engines',
+         'SparseGrowthMedium': 'Engines',
+         'StripedGrowthMedium': 'Engines',
+         'ParallelGrowthMedium': 'Engines',
+         'HashLifeGrowthMedium': 'HashLife',
+         'TiledGrowthMedium': 'Tiles'}
+
+
+def __getattr__(name: str) -> object:
+    if name in _lazy:
+        from importlib import import_module
+        return getattr(import_module('.' + _lazy[name], __name__), name)
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+
+def __dir__() -> list:
+    return sorted(list(globals()) + list(_lazy))
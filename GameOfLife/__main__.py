@@ -0,0 +1,167 @@
+from argparse import ArgumentParser
+from functools import partial
+from os.path import isfile, splitext
+from sys import exit, stdout
+from time import perf_counter
+
+# Engines by name, the models are imported only by the subcommands which need them so the command starts quickly
+engine_names = ['GrowthMedium', 'BitGrowthMedium', 'SparseGrowthMedium', 'StripedGrowthMedium',
+                'ParallelGrowthMedium', 'HashLifeGrowthMedium', 'TiledGrowthMedium']
+
+
+def _get_engine(name: str) -> type:
+    from .Engines import BitGrowthMedium, SparseGrowthMedium, StripedGrowthMedium, ParallelGrowthMedium
+    from .HashLife import HashLifeGrowthMedium
+    from .Models import GrowthMedium
+    from .Tiles import TiledGrowthMedium
+    engines = [GrowthMedium, BitGrowthMedium, SparseGrowthMedium, StripedGrowthMedium, ParallelGrowthMedium,
+               HashLifeGrowthMedium, TiledGrowthMedium]
+    return {engine.__name__: engine for engine in engines}[name]
+
+
+def _build(args: object) -> object:
+    """ Return the GrowthMedium of the pattern, a stored GrowthMedium name or a file path, with the rule.
+
+    The rule of the options comes before the one declared by the pattern file, which comes before B3/S23.
+
+    """
+    engine = _get_engine(args.engine)
+    if isfile(args.pattern):
+        from .Formats import formats, rule_formats
+        extension = splitext(args.pattern)[1]
+        if extension not in formats:
+            raise SystemExit('unknown format {}, known: {}'.format(extension, ' '.join(formats)))
+        with open(args.pattern, 'rb') as f:
+            gm = engine.set(formats[extension][0](f))
+            if extension in rule_formats:
+                f.seek(0)
+                rule = rule_formats[extension][0](f)
+                if rule is not None:
+                    gm.set_rule(rule)
+    elif engine.exists_growth_medium(args.pattern):
+        gm = engine.load(args.pattern)
+    else:
+        raise SystemExit('{} is neither a file nor a stored growth medium'.format(args.pattern))
+    if args.rule is not None:
+        gm.set_rule(args.rule)
+    return gm
+
+
+def _evolve(gm: object, generations: int, population: list = None) -> tuple:
+    """ Evolve a GrowthMedium from time 0, stopping on extinction or steady state.
+
+    :param gm: the GrowthMedium
+    :param generations: the maximum number of generations
+    :param population: the list where the population of each generation is appended, None to skip it
+    :return the triple (generations calculated, seconds, 'extinction', 'steady state' or None)
+    :type gm: GrowthMedium
+    :type generations: int
+    :type population: list
+    :rtype: tuple
+
+    """
+    gm.get_state_grid(0)
+    if population is not None:
+        population.append(gm.get_population())
+    status = None
+    start = perf_counter()
+    t = 0
+    while t < generations and status is None:
+        t += 1
+        _extinction, _steady_state, _ = gm.get_state_grid(t)
+        if population is not None:
+            population.append(gm.get_population())
+        status = 'extinction' if _extinction else 'steady state' if _steady_state else None
+    seconds = perf_counter() - start
+    if hasattr(gm, 'close'):
+        gm.close()
+    return t, seconds, status
+
+
+def run(args: object, options: list) -> int:
+    """ Evolve a pattern and print the throughput. """
+    gm = _build(args)
+    t, seconds, status = _evolve(gm, args.generations)
+    print('{} {} {}: {} generations in {:.3f} s, {:.1f} gen/s, population {}{}'.format(
+        type(gm).__name__, args.pattern, gm.rule, t, seconds, t / seconds if seconds > 0 else float('inf'),
+        gm.get_population(), ', ' + status if status else ''))
+    return 0
+
+
+def dump(args: object, options: list) -> int:
+    """ Evolve a pattern and write its final state, or the population of each generation. """
+    from .Formats import formats, rule_formats, write_rle
+    from numpy import zeros
+    gm = _build(args)
+    population = [] if args.population else None
+    _evolve(gm, args.generations, population)
+    if population is not None:
+        text = ''.join('{},{}\n'.format(i, n) for i, n in enumerate(population))
+        if args.output is None:
+            stdout.write(text)
+        else:
+            with open(args.output, 'w') as f:
+                f.write(text)
+        return 0
+
+    # the state is cropped to its alive cells
+    grid, _, row, col = gm._get_state()
+    bounds = gm._get_bounds()
+    if bounds is None:
+        grid = zeros((1, 1), dtype=bool)
+    else:
+        top, left, bottom, right = bounds
+        grid = grid[top - row:bottom - row + 1, left - col:right - col + 1] > 0
+    write = partial(write_rle, rule=gm.rule)
+    if args.output is not None:
+        extension = splitext(args.output)[1]
+        if extension not in formats:
+            raise SystemExit('unknown format {}, known: {}'.format(extension, ' '.join(formats)))
+        write = partial(rule_formats[extension][1], rule=gm.rule) if extension in rule_formats else \
+            formats[extension][1]
+    if args.output is None:
+        write(stdout.buffer, grid)
+        stdout.flush()
+    else:
+        with open(args.output, 'wb') as f:
+            write(f, grid)
+    return 0
+
+
+def benchmark(args: object, options: list) -> int:
+    """ Run the benchmark with its own options. """
+    from .Benchmark import main as benchmark_main
+    return benchmark_main(options)
+
+
+def main(args: list = None) -> int:
+    """ Run a subcommand from the command line, Kivy is never imported. """
+    parser = ArgumentParser(prog='python -m GameOfLife', description='Run the Game Of Life models without a display. '
+                            'PATTERN is the name of a stored growth medium or the path of a pattern file.')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+
+    for name, command, description in (('run', run, 'evolve a pattern and print the throughput'),
+                                       ('dump', dump, 'evolve a pattern and write its final state or population')):
+        sub = subcommands.add_parser(name, help=description, description=description)
+        sub.add_argument('pattern', help='stored growth medium name or pattern file')
+        sub.add_argument('-g', '--generations', type=int, default=1000, help='generations to evolve')
+        sub.add_argument('-e', '--engine', choices=engine_names, default='BitGrowthMedium', help='engine')
+        sub.add_argument('-r', '--rule',
+                         help='rule of the Game, as B3/S23 or a name (the one of the pattern file, or B3/S23)')
+        sub.set_defaults(command=command)
+    sub = subcommands.choices['dump']
+    sub.add_argument('-o', '--output', help='file of the state, in the format of its extension (RLE on stdout)')
+    sub.add_argument('-p', '--population', action='store_true', help='write the CSV population of each generation')
+
+    sub = subcommands.add_parser('benchmark', help='measure the engines, see python -m GameOfLife.Benchmark -h',
+                                 add_help=False)
+    sub.set_defaults(command=benchmark)
+
+    args, options = parser.parse_known_args(args)
+    if options and args.command is not benchmark:
+        parser.error('unrecognized arguments: {}'.format(' '.join(options)))
+    return args.command(args, options)
+
+
+if __name__ == '__main__':
+    exit(main())
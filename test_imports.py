@@ -0,0 +1,21 @@
+from GameOfLife.Benchmark import Benchmark
+from unittest import TestCase, main
+
+
+class TestImports(TestCase):
+    """ The headless modules import within Benchmark.import_budget and without Kivy or SciPy, in a new interpreter. """
+
+    modules = ['GameOfLife', 'GameOfLife.Models', 'GameOfLife.Engines']
+
+    def test_imports(self):
+        benchmark = Benchmark()
+        for module in self.modules:
+            with self.subTest(module=module):
+                measure = benchmark.run_import(module)
+                self.assertEqual(measure['heavy'], [], '{} loads {}'.format(module, ' '.join(measure['heavy'])))
+                self.assertLessEqual(measure['seconds'], benchmark.import_budget,
+                                     '{} takes {:.1f} ms to import'.format(module, measure['seconds'] * 1000))
+
+
+if __name__ == '__main__':
+    main()